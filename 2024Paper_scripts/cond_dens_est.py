@@ -38,23 +38,6 @@ def evaluate_stored_cdf(s: list, X: np.ndarray):
     return cdf_array
 
 
-def evaluate_stored_pdf(s: list, X: np.ndarray):
-    """for parallelisation
-
-    Args:
-        s (list): index of cond_dists.pkl
-        X (np.ndarray): evaluation points
-
-    Returns:
-        np.ndarray: pdf evaluated at given points
-    """
-
-    print(s)
-    pdf_array = cond_dists[s].eval_pdf(X, smooth=False)
-
-    return pdf_array
-
-
 if __name__ == "__main__":
 
     # average number of storms per year
@@ -93,9 +76,8 @@ if __name__ == "__main__":
     rp = np.round(return_level(period, cdf_an, X), 3)
 
     # getting conditional density ----------------------------------------------------------
-    cl = mp.Pool(4)
-    rp_cond_theta = cl.starmap(evaluate_stored_pdf, [[i, np.array([rp])] for i in range(env_probs.shape[0])])
-    cl.close()
+    # a single point per row is cheaper to evaluate here than to send to a pool
+    rp_cond_theta = [cond_dists[i].eval_pdf(np.array([rp]), smooth=False) for i in range(env_probs.shape[0])]
 
     # rp_marg = np.tile(eval_pdf(rp, mids, f_pdf), len(cond_dists))
     rp_cond_theta = np.concatenate(rp_cond_theta, axis=0)
@@ -112,11 +94,8 @@ if __name__ == "__main__":
     # failure prob region ------------------------------------------------------------------
     rc = rp
 
-    cl = mp.Pool(4)
-    fail_ps = cl.starmap(evaluate_stored_cdf, [[i, np.array([rp])] for i in range(env_probs.shape[0])])
-    fail_ps = [[1-i] for i in fail_ps]
+    fail_ps = [[1 - cond_dists[i].eval_cdf(np.array([rp]), smooth=False)] for i in range(env_probs.shape[0])]
     fail_ps = np.array(fail_ps).reshape(len(env_probs['dens']),)
-    cl.close()
     fail_ps_full = np.tile(0.0, nfull)
     fail_ps_full[env_probs.index] = fail_ps
 
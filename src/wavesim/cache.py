@@ -0,0 +1,113 @@
+'''
+Code for caching repeated array computations across calls
+
+'''
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+import numpy as np
+
+
+def array_key(*args) -> tuple:
+    """builds a hashable cache key from a mix of arrays and scalars
+
+    Args:
+        *args: arrays, scalars or other hashable objects making up the key
+
+    Returns:
+        tuple: hashable key, arrays are keyed on their shape, dtype and contents
+    """
+    key = []
+    for arg in args:
+        if isinstance(arg, np.ndarray):
+            key.append((arg.shape, arg.dtype.str, arg.tobytes()))
+        else:
+            key.append(arg)
+
+    return tuple(key)
+
+
+def _set_read_only(value: Any) -> None:
+    """marks cached arrays as read only so they can be shared between callers
+
+    Args:
+        value (Any): array, or tuple or dict of arrays, stored in the cache
+    """
+    if isinstance(value, dict):
+        values = tuple(value.values())
+    elif isinstance(value, tuple):
+        values = value
+    else:
+        values = (value,)
+
+    for v in values:
+        if isinstance(v, np.ndarray):
+            v.flags.writeable = False
+        elif isinstance(v, (tuple, dict)):
+            _set_read_only(v)
+
+
+@dataclass
+class LRUCache():
+    """ bounded cache which evicts the least recently used entry when full
+
+    Args:
+        maxsize (int): maximum number of entries held
+    """
+
+    maxsize: int = 64
+
+    def __post_init__(self):
+        self._store = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._store
+
+    def clear(self) -> None:
+        """empties the cache
+        """
+        self._store.clear()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """returns the value stored against key, marking it as recently used, or default if it is not stored
+
+        Args:
+            key (Hashable): cache key, see array_key
+            default (Any, optional): returned when key is not stored. Defaults to None.
+
+        Returns:
+            Any: cached value
+        """
+        if key not in self._store:
+            return default
+
+        self._store.move_to_end(key)
+        return self._store[key]
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """returns the value stored against key, computing and storing it first if needed
+
+        arrays returned are read only as they are shared between all callers
+
+        Args:
+            key (Hashable): cache key, see array_key
+            compute (Callable[[], Any]): function returning the value for key
+
+        Returns:
+            Any: cached value
+        """
+        if key in self._store:
+            self._store.move_to_end(key)
+            return self._store[key]
+
+        value = compute()
+        _set_read_only(value)
+        self._store[key] = value
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+        return value
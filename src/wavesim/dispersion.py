@@ -8,6 +8,11 @@ ADD REF HERE
 from __future__ import annotations
 import numpy as np
 from scipy import optimize
+from scipy.interpolate import CubicSpline
+from wavesim.cache import LRUCache, array_key
+
+_DISPERSION_CACHE = LRUCache(maxsize=64)
+_DISPERSION_TABLE = None
 
 
 def fDispersionSTOKES5(h, H, omega) -> float:
@@ -88,3 +93,164 @@ def _dispersion_diff(k: np.ndarray, h: np.ndarray, omega: np.ndarray) -> float:
     """
     g = 9.81
     return omega ** 2 - g * k * np.tanh(k * h)
+
+
+def newton_solve_dispersion(omega: np.ndarray, h: float, tol: float = 1e-15, max_iter: int = 50) -> np.ndarray:
+    """returns wave numbers k for an array of angular frequencies using safeguarded Newton-Raphson
+
+    seeded from the approximation in alt_solve_dispersion and kept within the bracket
+    omega^2/g <= k <= omega^2/(g tanh(omega^2 h/g))
+
+    Args:
+        omega (np.ndarray): angular frequency [s^-1]
+        h (float): water depth [metres]
+        tol (float): relative tolerance on k
+        max_iter (int): maximum number of Newton iterations
+
+    Returns:
+        k (np.ndarray): wave number [m^-1]
+    """
+    g = 9.81
+    omega = np.abs(np.asarray(omega, dtype=float))
+    k = np.zeros(omega.shape)
+    pos = omega > 0
+
+    k0 = omega[pos] ** 2 / g
+    lo = k0
+    hi = k0 / np.tanh(k0 * h)
+
+    def residual(k):
+        kh = k * h
+        sech_sq = 4 * np.exp(-2 * kh) / (1 + np.exp(-2 * kh)) ** 2
+        return g * k * np.tanh(kh) - omega[pos] ** 2, g * (np.tanh(kh) + kh * sech_sq)
+
+    k[pos] = _safeguarded_newton(residual, alt_solve_dispersion(omega[pos], h), lo, hi, tol, max_iter)
+
+    return k
+
+
+def newton_dispersion_stokes5(h: np.ndarray, H: np.ndarray, omega: np.ndarray, tol: float = 1e-15,
+                              max_iter: int = 50) -> np.ndarray:
+    """solves the progressive wave dispersion equation in fDispersionSTOKES5 for arrays of wave heights and
+    frequencies using safeguarded Newton-Raphson
+
+    Args:
+        h (np.ndarray): depth [m], only used to seed the iteration
+        H (np.ndarray): wave height [m]
+        omega (np.ndarray): angular frequency [s^-1]
+        tol (float): relative tolerance on k
+        max_iter (int): maximum number of Newton iterations
+
+    Returns:
+        np.ndarray: wave number k [1/m]
+    """
+    g = 9.81
+    H, omega = np.broadcast_arrays(np.asarray(H, dtype=float), np.asarray(omega, dtype=float))
+
+    # the linear deep water solution bounds k from above, and bounds the wave height terms from below
+    hi = omega ** 2 / g
+    lo = hi / (1 + (H * hi) ** 2 / 8 + (H * hi) ** 4 / 128) ** 2
+
+    def residual(k):
+        return _progressive_dispersion(k, H, omega), \
+            H ** 2 * k / 4 + H ** 4 * k ** 3 / 32 + omega / (2 * np.sqrt(g) * k ** 1.5)
+
+    return _safeguarded_newton(residual, alt_solve_dispersion(omega, h), lo, hi, tol, max_iter)
+
+
+def _safeguarded_newton(residual, k: np.ndarray, lo: np.ndarray, hi: np.ndarray, tol: float,
+                        max_iter: int) -> np.ndarray:
+    """vectorised Newton-Raphson for a residual increasing in k, falling back to bisection whenever a step
+    leaves the bracket [lo, hi]
+
+    Args:
+        residual (Callable): returns the residual and its derivative at k
+        k (np.ndarray): initial guess
+        lo (np.ndarray): lower bracket, residual <= 0
+        hi (np.ndarray): upper bracket, residual >= 0
+        tol (float): relative tolerance on k
+        max_iter (int): maximum number of iterations
+
+    Returns:
+        np.ndarray: roots
+    """
+    lo = lo.copy()
+    hi = hi.copy()
+    k = np.clip(k, lo, hi)
+
+    for _ in range(max_iter):
+        r, dr = residual(k)
+        lo = np.where(r < 0, k, lo)
+        hi = np.where(r > 0, k, hi)
+
+        k_new = k - r / dr
+        outside = ~((k_new >= lo) & (k_new <= hi))
+        k_new[outside] = (lo[outside] + hi[outside]) / 2
+
+        converged = np.all(np.abs(k_new - k) <= tol * np.abs(k_new))
+        k = k_new
+        if converged:
+            break
+
+    return k
+
+
+def _dispersion_table() -> CubicSpline:
+    """returns the interpolant of log(kh) against log(omega^2 h/g), built on first use
+
+    Returns:
+        CubicSpline: interpolant valid for 1e-8 <= omega^2 h/g <= 50
+    """
+    global _DISPERSION_TABLE
+    if _DISPERSION_TABLE is None:
+        g = 9.81
+        X = np.logspace(-8, np.log10(50), 2049)
+        Y = newton_solve_dispersion(np.sqrt(g * X), 1.0)  # with h = 1 the wave number is kh
+        _DISPERSION_TABLE = CubicSpline(np.log(X), np.log(Y))
+
+    return _DISPERSION_TABLE
+
+
+def lookup_dispersion(omega: np.ndarray, h: float) -> np.ndarray:
+    """returns wave numbers by interpolating a precomputed table of kh against omega^2 h/g
+
+    outside the table kh = omega^2 h/g (deep water) or kh = sqrt(omega^2 h/g) (1 + omega^2 h/(6g)) (shallow water),
+    both exact to double precision there
+
+    Args:
+        omega (np.ndarray): angular frequency [s^-1]
+        h (float): water depth [metres]
+
+    Returns:
+        k (np.ndarray): wave number [m^-1]
+    """
+    g = 9.81
+    X = np.asarray(omega, dtype=float) ** 2 * h / g
+    Y = np.zeros(X.shape)
+
+    deep = X > 50
+    shallow = (X < 1e-8) & (X > 0)
+    table = ~deep & ~shallow & (X > 0)
+
+    Y[deep] = X[deep]
+    Y[shallow] = np.sqrt(X[shallow]) * (1 + X[shallow] / 6)
+    Y[table] = np.exp(_dispersion_table()(np.log(X[table])))
+
+    return Y / h
+
+
+def cached_dispersion(omega: np.ndarray, h: float) -> np.ndarray:
+    """returns wave numbers from lookup_dispersion, cached on (omega, h) across the whole process
+
+    the cache is bounded with least recently used eviction and the returned array is read only
+
+    Args:
+        omega (np.ndarray): angular frequency [s^-1]
+        h (float): water depth [metres]
+
+    Returns:
+        k (np.ndarray): wave number [m^-1]
+    """
+    omega = np.asarray(omega, dtype=float)
+
+    return _DISPERSION_CACHE.get_or_compute(array_key(omega, float(h)), lambda: lookup_dispersion(omega, h))
@@ -13,10 +13,47 @@ from wavesim.loading import MorisonLoad
 from wavesim.spectrum import SeaState
 from wavesim.crestdistributions import rayleigh_pdf
 from dataclasses import dataclass
-from scipy.signal import argrelextrema
+from typing import ClassVar
 from scipy.stats import gaussian_kde
+from scipy.signal import fftconvolve
 import matplotlib.pyplot as plt
-from scipy.integrate import quad
+from scipy.special import ndtr
+
+
+def sea_state_max(crests: np.ndarray, series: np.ndarray) -> np.ndarray:
+    """finds the maximum of series over the wave containing t=0 for each sea state
+
+    the wave is bounded by the local minima of crests either side of the centre of the time series. All sea states
+    are handled at once, series may carry extra axes between time and sea state, e.g. (nt, n_profiles, nss)
+
+    Args:
+        crests (np.ndarray): surface elevation time series (nt, nss)
+        series (np.ndarray): response time series (nt, ..., nss)
+
+    Returns:
+        np.ndarray: maximum response of each sea state (..., nss)
+    """
+    nt = crests.shape[0]
+    t_idx = np.arange(nt)[:, np.newaxis]
+
+    # strict interior local minima, as found by argrelextrema(crests, np.less)
+    is_min = np.zeros(crests.shape, dtype=bool)
+    is_min[1:-1] = (crests[1:-1] < crests[:-2]) & (crests[1:-1] < crests[2:])
+
+    lower_min = np.max(np.where(is_min & (t_idx < nt/2), t_idx, -1), axis=0)
+    upper_min = np.min(np.where(is_min & (t_idx > nt/2), t_idx, nt), axis=0)
+
+    missing = (lower_min < 0) | (upper_min >= nt)
+    if np.any(missing):
+        raise ValueError(f"no minimum either side of the centre of the time series for sea states "
+                         f"{np.flatnonzero(missing)}")
+
+    # only the rows spanned by some window are scanned
+    start, stop = np.min(lower_min), np.max(upper_min)
+    window = (t_idx[start:stop] >= lower_min) & (t_idx[start:stop] < upper_min)
+    window = window.reshape(window.shape[:1] + (1,) * (series.ndim - 2) + window.shape[1:])
+
+    return np.max(np.where(window, series[start:stop], -np.inf), axis=0).astype(float)
 
 
 @dataclass
@@ -31,14 +68,22 @@ class weighted_cdf():
     dataset: np.ndarray
     weights: np.ndarray
 
+    def __post_init__(self):
+        order = np.argsort(self.dataset, kind='stable')
+        self._sorted = np.asarray(self.dataset)[order]
+        cum_weights = np.cumsum(np.asarray(self.weights, dtype=float)[order])
+        self._cum_weights = np.concatenate([[0.0], cum_weights]) / cum_weights[-1]
+
     def evaluate(self, X: np.ndarray):
         """evaulate cdf at given points
 
+        the weight of data strictly below each point is looked up from the presorted data, so ties at X are excluded
+
         Args:
             X (np.ndarray): evaluation points
         """
 
-        return np.sum((X[:, None] > self.dataset[None, :])*self.weights, axis=1)/np.sum(self.weights)
+        return self._cum_weights[np.searchsorted(self._sorted, X, side='left')]
 
     __call__ = evaluate
 
@@ -46,9 +91,17 @@ class weighted_cdf():
 @dataclass
 class intr_krnl_cdf():
     """computes cdf by integration of a smoothed kernel density estimator of the pdf
+
+    the integral of a weighted gaussian kde is the weighted sum of the normal cdfs of its kernels, so it is evaluated
+    in closed form over all points at once
+
+    Args:
+        kde (gaussian_kde): one dimensional weighted kernel density estimate
+        chunk_size (int): approximate number of (point, sample) pairs evaluated at once
     """
 
     kde: gaussian_kde
+    chunk_size: int = 2**20
 
     def evaluate(self, X: np.ndarray):
         """evaluate the cdf at given points
@@ -57,24 +110,154 @@ class intr_krnl_cdf():
             X (np.ndarray): evaluation points
 
         """
+        X = np.asarray(X, dtype=float)
+        flat_X = X.ravel()
+
+        data = self.kde.dataset[0]
+        bandwidth = np.sqrt(self.kde.covariance[0, 0])
+        step = max(1, self.chunk_size // len(data))
 
-        multi_X = np.vectorize(self.__single_X)
+        cdf = np.empty(flat_X.shape)
+        for start in range(0, len(flat_X), step):
+            z = (flat_X[start:start + step, np.newaxis] - data[np.newaxis, :]) / bandwidth
+            cdf[start:start + step] = ndtr(z) @ self.kde.weights
 
-        return multi_X(X)
+        return cdf.reshape(X.shape)
 
     __call__ = evaluate
 
-    def __single_X(self, X: float):
-        """integrate the pdf up to a single X point
+
+@dataclass
+class binned_kde():
+    """weighted gaussian kernel density estimate evaluated on a grid by linear binning and fft convolution
+
+    the bandwidth follows gaussian_kde with bw_method='scott', the weighted standard deviation scaled by
+    n_eff^(-1/5) with n_eff = 1 / sum(w^2) for normalised weights. Building costs O(N + num_bins log num_bins), after
+    which the pdf and cdf are interpolated from the grid
+
+    Args:
+        dataset (np.ndarray): data
+        weights (np.ndarray): weights for IS
+        num_bins (int): number of grid points
+        cut (float): bandwidths of padding beyond the data, and half width of the kernel
+    """
+
+    dataset: np.ndarray
+    weights: np.ndarray
+    num_bins: int = 2**12
+    cut: float = 8.0
+
+    def __post_init__(self):
+        data = np.asarray(self.dataset, dtype=float)
+        weights = np.asarray(self.weights, dtype=float)
+        weights = weights / np.sum(weights)
+
+        n_eff = 1 / np.sum(weights ** 2)
+        self.bandwidth = np.sqrt(np.cov(data, aweights=weights)) * n_eff ** (-1 / 5)
+
+        pad = self.cut * self.bandwidth
+        self.grid = np.linspace(np.min(data) - pad, np.max(data) + pad, self.num_bins)
+        delta = self.grid[1] - self.grid[0]
+
+        # linear binning, each weight is shared between its two neighbouring grid points
+        position = (data - self.grid[0]) / delta
+        lower = np.minimum(np.floor(position).astype(int), self.num_bins - 2)
+        upper_share = position - lower
+        counts = np.bincount(lower, weights=weights * (1 - upper_share), minlength=self.num_bins) \
+            + np.bincount(lower + 1, weights=weights * upper_share, minlength=self.num_bins)
+
+        half_width = min(int(np.ceil(pad / delta)), self.num_bins - 1)
+        lags = np.arange(-half_width, half_width + 1) * delta / self.bandwidth
+        self.density = np.maximum(fftconvolve(counts, np.exp(-0.5 * lags ** 2), mode='same'), 0) \
+            / (self.bandwidth * np.sqrt(2 * np.pi))
+
+        # kernels more than half_width points below contribute their full weight to the cdf
+        below = np.concatenate([np.zeros(half_width + 1), np.cumsum(counts)[:self.num_bins - half_width - 1]])
+        self.cdf_values = np.clip(fftconvolve(counts, ndtr(lags), mode='same') + below, 0, 1)
+
+    def evaluate(self, X: np.ndarray):
+        """evaluate the pdf at given points
 
         Args:
-            X (float): integration upper limit
+            X (np.ndarray): evaluation points
+        """
 
-        Returns:
-            float: cdf
+        return np.interp(X, self.grid, self.density, left=0, right=0)
+
+    __call__ = evaluate
+
+    def cdf(self, X: np.ndarray):
+        """evaluate the cdf at given points
+
+        Args:
+            X (np.ndarray): evaluation points
+        """
+
+        return np.interp(X, self.grid, self.cdf_values, left=0, right=1)
+
+
+@dataclass
+class tabulated_dist():
+    """distribution tabulated on a grid, cdf queries are interpolations
+
+    the cdf is held as both log cdf and log survival function, interpolating whichever is smaller so both tails keep
+    their relative accuracy. The pdf is only evaluated at the query points, from the kde and the tabulated cdf
+
+    Args:
+        grid (np.ndarray): increasing evaluation points
+        log_cdf (np.ndarray): log of the cdf at grid
+        log_sf (np.ndarray): log of one minus the cdf at grid
+        kde (gaussian_kde | binned_kde): density estimate of a single wave maximum
+        exponent (float): power the single wave cdf is raised to, the number of waves per sea state
+    """
+
+    grid: np.ndarray
+    log_cdf: np.ndarray
+    log_sf: np.ndarray
+    kde: gaussian_kde | binned_kde
+    exponent: float
+
+    def cdf(self, X: np.ndarray):
+        """evaluate the cdf at given points
+
+        Args:
+            X (np.ndarray): evaluation points
+        """
+        log_cdf = np.interp(X, self.grid, self.log_cdf, left=-np.inf, right=0)
+        log_sf = np.interp(X, self.grid, self.log_sf, left=0, right=-np.inf)
+
+        return np.where(log_cdf < log_sf, np.exp(log_cdf), -np.expm1(log_sf))
+
+    __call__ = cdf
+
+    def sf(self, X: np.ndarray):
+        """evaluate the survival function, one minus the cdf, at given points
+
+        Args:
+            X (np.ndarray): evaluation points
+        """
+        return 1 - self.cdf(X)
+
+    def pdf(self, X: np.ndarray):
+        """evaluate the pdf at given points
+
+        Args:
+            X (np.ndarray): evaluation points
         """
+        Q = self.exponent
+        log_cdf = np.interp(X, self.grid, self.log_cdf, left=-np.inf, right=0)
 
-        return quad(self.kde, -5, X)[0]
+        return self.kde(X) * Q * np.exp((Q - 1) / Q * log_cdf)
+
+    def quantile(self, p: np.ndarray):
+        """evaluate the inverse cdf at given probabilities, limited to the tabulated range
+
+        Args:
+            p (np.ndarray): non exceedance probabilities
+        """
+        # -log_sf increases along the grid, so interpolate the grid against it
+        with np.errstate(divide='ignore'):
+            return np.interp(-np.log1p(-np.asarray(p, dtype=float)), -self.log_sf, self.grid)
 
 
 @dataclass
@@ -87,12 +270,17 @@ class AbstractDistEst(ABC):
         z_values (np.ndarray): z_values to calculate kinematics at
         sim_frequency (float): frequency of linear wave simulation
         sim_min (float): length of conditioned simulations
+        dtype (type): floating point type used for the kinematics and load simulations
+        required_fields (tuple): kinematic fields needed for the response, beyond eta (class attribute)
     """
 
     sea_state: SeaState
     z_values: np.ndarray
     sim_frequency: float = 4.0
     sim_min: float = 2.0
+    dtype: type = np.float64
+
+    required_fields: ClassVar[tuple] = ()
 
     @property
     def dz(self) -> float:
@@ -158,16 +346,58 @@ class AbstractDistEst(ABC):
     def compute_kinematics(self) -> None:
         """ get kinematics
         """
-        self.kinematics = LinearKin(self.sim_frequency, self.sim_period, self.z_values, self.sea_state)
-        self.kinematics.compute_spectrum()
-        self.kinematics.compute_kinematics(cond=True, a=self.cond_crests)
+        self.kinematics = self._simulate(self.sea_state, self.cond_crests)
         return None
 
+    def _simulate(self, sea_state: SeaState, cond_crests: np.ndarray) -> LinearKin:
+        """simulates conditioned linear kinematics for the given sea states
+
+        Args:
+            sea_state (SeaState): sea states to simulate
+            cond_crests (np.ndarray): crest elevation to condition each sea state on
+
+        Returns:
+            LinearKin: computed kinematics
+        """
+        kinematics = LinearKin(self.sim_frequency, self.sim_period, self.z_values, sea_state, dtype=self.dtype)
+        kinematics.compute_spectrum()
+        kinematics.compute_kinematics(cond=True, a=cond_crests, fields=self.required_fields)
+        return kinematics
+
     @abstractmethod
     def compute_sea_state_max(self) -> AbstractDistEst:
         """gets the relevant sea-state maxes
         """
 
+    @abstractmethod
+    def _block_response(self, kinematics: LinearKin) -> np.ndarray:
+        """returns the response time series whose maxes are estimated, for a block of sea states
+
+        Args:
+            kinematics (LinearKin): computed kinematics for the block
+
+        Returns:
+            np.ndarray: response time series (nt, nss)
+        """
+
+    def compute_streamed_max(self, chunk_size: int = 100) -> None:
+        """computes the sea-state maxes, simulating chunk_size sea states at a time
+
+        replaces compute_kinematics (and compute_load) followed by compute_sea_state_max, each block is reduced to its
+        maxes and discarded before the next is simulated so peak memory is bounded by chunk_size rather than num_SS
+
+        Args:
+            chunk_size (int): number of sea states simulated per block
+        """
+
+        self.max_series = np.empty(self.sea_state.num_SS)
+        for start in range(0, self.sea_state.num_SS, chunk_size):
+            idx = np.arange(start, min(start + chunk_size, self.sea_state.num_SS))
+            kinematics = self._simulate(self.sea_state.select(idx), self.cond_crests[idx])
+            self.max_series[idx] = sea_state_max(kinematics.eta, self._block_response(kinematics))
+
+        return None
+
     def compute_cdf(self) -> None:
         """computes both versions of importance sampled distribution
         """
@@ -175,7 +405,10 @@ class AbstractDistEst(ABC):
         if self.pdf is None:
             raise Exception("You must compute the pdf first")
         self.cdf = weighted_cdf(dataset=self.max_series, weights=self.weights)
-        self.cdf_smooth = intr_krnl_cdf(self.pdf)
+        if isinstance(self.pdf, binned_kde):
+            self.cdf_smooth = self.pdf.cdf
+        else:
+            self.cdf_smooth = intr_krnl_cdf(self.pdf)
 
         return None
 
@@ -195,11 +428,21 @@ class AbstractDistEst(ABC):
         else:
             return self.cdf(X)**(self.sim_per_state*self.waves_per_sim)
 
-    def compute_pdf(self) -> np.ndarray:
-        """computes the pdf using a weighted kernel esimation method from the scipy package
+    def compute_pdf(self, method: str = 'gaussian', num_bins: int = 2**12) -> np.ndarray:
+        """computes the pdf using a weighted kernel esimation method
+
+        Args:
+            method (str, optional): 'gaussian' for scipy's gaussian_kde, exact but O(N) per evaluation point, or
+                'binned' for binned_kde, which scales to very large datasets. Defaults to 'gaussian'.
+            num_bins (int, optional): number of grid points for the binned method. Defaults to 2**12.
         """
 
-        self.pdf = gaussian_kde(dataset=self.max_series, weights=self.weights, bw_method='scott')
+        if method == 'gaussian':
+            self.pdf = gaussian_kde(dataset=self.max_series, weights=self.weights, bw_method='scott')
+        elif method == 'binned':
+            self.pdf = binned_kde(dataset=self.max_series, weights=self.weights, num_bins=num_bins)
+        else:
+            raise ValueError(f"unknown kde method {method}, expected 'gaussian' or 'binned'")
 
         return None
 
@@ -221,6 +464,50 @@ class AbstractDistEst(ABC):
         else:
             return self.pdf(X) * Q * self.cdf(X) ** (Q - 1)
 
+    def freeze(self, num_points: int = 2048, lower: float = None, upper: float = None) -> tabulated_dist:
+        """tabulates the rescaled smooth cdf once so repeated queries cost an interpolation
+
+        the cdf is first evaluated on a uniform grid 4 times finer than num_points, and the final points are spaced
+        evenly in arc length along the (x, log survival function) curve, concentrating them where the tail falls
+        fastest. Only the smooth cdf is tabulated, interpolating the step ecdf would blur its jumps, so use
+        eval_cdf(X, smooth=False) for that
+
+        Args:
+            num_points (int, optional): number of tabulation points. Defaults to 2048.
+            lower (float, optional): lowest tabulated point. Defaults to half the data range below the data.
+            upper (float, optional): highest tabulated point. Defaults to half the data range above the data.
+
+        Returns:
+            tabulated_dist: frozen distribution
+        """
+
+        if self.pdf is None:
+            raise Exception("You must compute the pdf first")
+
+        Q = self.sim_per_state * self.waves_per_sim
+        floor = np.log(np.finfo(float).tiny)
+
+        def log_cdf_sf(X):
+            with np.errstate(divide='ignore'):
+                log_cdf = Q * np.log(np.clip(self.cdf_smooth(X), 0, 1))
+            log_sf = np.log(-np.expm1(log_cdf), where=log_cdf < 0, out=np.full(X.shape, -np.inf))
+            return np.maximum(log_cdf, floor), np.maximum(log_sf, floor)
+
+        spread = (np.max(self.max_series) - np.min(self.max_series)) / 2
+        lower = np.min(self.max_series) - spread if lower is None else lower
+        upper = np.max(self.max_series) + spread if upper is None else upper
+
+        fine = np.linspace(lower, upper, 4 * num_points)
+        _, fine_sf = log_cdf_sf(fine)
+        arc = np.concatenate([[0], np.cumsum(np.hypot(np.diff(fine) / (upper - lower),
+                                                      np.diff(fine_sf) / max(np.ptp(fine_sf), 1)))])
+        grid = np.interp(np.linspace(0, arc[-1], num_points), arc, fine)
+        grid = np.unique(np.concatenate([grid, [lower, upper]]))
+
+        log_cdf, log_sf = log_cdf_sf(grid)
+
+        return tabulated_dist(grid=grid, log_cdf=log_cdf, log_sf=log_sf, kde=self.pdf, exponent=Q)
+
     def plot_distribution(self, X: np.ndarray, log=True) -> None:
         """ plot the stored distribution
 
@@ -256,20 +543,13 @@ class CrestDistEst(AbstractDistEst):
     """
 
     def compute_sea_state_max(self) -> None:
-        self.max_series = np.empty(self.sea_state.num_SS)
-        for s in range(self.sea_state.num_SS):
-
-            crests, _, _, _, _ = self.kinematics.retrieve_kinematics()
-            crests = crests[:, s]
-            # get maximums
-            mins = argrelextrema(crests, np.less)[0]
-            lower_min = np.max(mins[mins < self.kinematics.nt/2])
-            upper_min = np.min(mins[mins > self.kinematics.nt/2])
-            slice = crests[lower_min:upper_min]
-            self.max_series[s] = max(slice)
+        self.max_series = sea_state_max(self.kinematics.eta, self.kinematics.eta)
 
         return None
 
+    def _block_response(self, kinematics: LinearKin) -> np.ndarray:
+        return kinematics.eta
+
 
 @dataclass
 class MorisonDistEst(AbstractDistEst):
@@ -278,32 +558,66 @@ class MorisonDistEst(AbstractDistEst):
     Args:
         c_d (np.ndarray): drag coefficient array
         c_m (np.ndarray): inertia coefficient array
+        response (str): load quantity to take maxima of, 'shear', 'moment' or 'section'
+        elevation (float): elevation of the section when response is 'section' [m]
     """
 
     c_d: np.ndarray = 1
     c_m: np.ndarray = 1
+    response: str = 'shear'
+    elevation: float = None
+
+    required_fields: ClassVar[tuple] = MorisonLoad.required_fields
 
     def compute_load(self) -> None:
         """compute loading from kinematics
         """
 
-        self.load = MorisonLoad(self.kinematics, self.c_d, self.c_m)
+        self.load = MorisonLoad(self.kinematics, self.c_d, self.c_m, dtype=self.dtype, elevations=self.elevation)
         self.load.compute_load()
 
         return None
 
     def compute_sea_state_max(self) -> None:
-        self.max_series = np.empty(self.sea_state.num_SS)
-        for s in range(self.sea_state.num_SS):
-
-            crests, _, _, _, _ = self.kinematics.retrieve_kinematics()
-            crests = crests[:, s]
-            load = self.load.retrieve_load()[:, s]
-            # get maximums
-            mins = argrelextrema(crests, np.less)[0]
-            lower_min = np.max(mins[mins < self.kinematics.nt/2])
-            upper_min = np.min(mins[mins > self.kinematics.nt/2])
-            slice = load[lower_min:upper_min]
-            self.max_series[s] = max(slice)
+        self.max_series = sea_state_max(self.kinematics.eta, self._load_response(self.load))
 
         return None
+
+    def _block_response(self, kinematics: LinearKin) -> np.ndarray:
+        load = MorisonLoad(kinematics, self.c_d, self.c_m, dtype=self.dtype, elevations=self.elevation)
+        load.compute_load()
+        return self._load_response(load)
+
+    def compute_profile_max(self, c_d: np.ndarray, c_m: np.ndarray, diameter: np.ndarray = 1.0,
+                            groups: np.ndarray = None) -> np.ndarray:
+        """computes the sea-state maxes of many coefficient profiles from one load basis of the stored kinematics
+
+        Args:
+            c_d (np.ndarray): drag coefficient of each group (n_profiles, n_groups), see MorisonLoad.profile_loads
+            c_m (np.ndarray): inertia coefficient of each group (n_profiles, n_groups)
+            diameter (np.ndarray, optional): diameter of each profile (n_profiles,). Defaults to 1.0.
+            groups (np.ndarray, optional): integer group label of each z value. Defaults to a group per level.
+
+        Returns:
+            np.ndarray: sea-state maxes of each profile (n_profiles, nss)
+        """
+        load = MorisonLoad(self.kinematics, self.c_d, self.c_m, dtype=self.dtype)
+        load.compute_basis(groups, quantity=self.response)
+
+        return sea_state_max(self.kinematics.eta, load.profile_loads(c_d, c_m, diameter))
+
+    def _load_response(self, load: MorisonLoad) -> np.ndarray:
+        """picks the tracked quantity out of a computed load
+
+        Args:
+            load (MorisonLoad): computed load
+
+        Returns:
+            np.ndarray: response time series (nt, nss)
+        """
+        if self.response == 'section':
+            if self.elevation is None:
+                raise ValueError("an elevation is needed to track the sectional shear")
+            return load.retrieve_load('section')[:, 0, :]
+
+        return load.retrieve_load(self.response)
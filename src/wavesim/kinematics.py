@@ -7,57 +7,318 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 import numpy as np
-import math
-from wavesim.dispersion import alt_solve_dispersion, solve_dispersion, fDispersionSTOKES5
-from wavesim.spectrum import AbstractSpectrum, SeaState
-from scipy.fft import fft, fftshift
+from wavesim.dispersion import cached_dispersion, newton_dispersion_stokes5
+from wavesim.spectrum import AbstractSpectrum, DirectionalSpectrum, SeaState, SpectrumBatch
+from wavesim.cache import LRUCache, array_key
+from scipy.fft import irfft, fftshift
 import matplotlib.pyplot as plt
-import warnings
+from matplotlib.animation import PillowWriter
+from typing import Iterable, Iterator
 
-# TODO: create classes for spatial waves
+_TRANSFER_CACHE = LRUCache(maxsize=32)
+_STOKES_CACHE = LRUCache(maxsize=64)
+
+KINEMATIC_FIELDS = ('u', 'w', 'du', 'dw')
+DIRECTIONAL_FIELDS = ('u', 'v', 'w', 'du', 'dv', 'dw')
 
 
 def spatial_random_wave(om_range: np.ndarray, phi_range: np.ndarray, Dr_spctrm: np.ndarray, t: np.ndarray,
-                        x_range: np.ndarray, y_range: np.ndarray, h: float) -> np.ndarray:
+                        x_range: np.ndarray, y_range: np.ndarray, h: float,
+                        rng: np.random.Generator = None) -> np.ndarray:
     """returns random wave surface with frequency direction spectrum defined below
 
     Args:
         omega_range (np.ndarray): values of angular frequency to include
         phi_range (np.ndarray): values of direction to include
-        t (np.ndarray): time (scalar)
+        Dr_spctrm (np.ndarray): frequency direction spectrum (phi_num, om_num)
+        t (np.ndarray): time, scalar or vector of times sharing one realisation
         x_range (np.ndarray): range of x to evaluate over (forms a grid with y_range)
         y_range (np.ndarray): range of y to evaluate over (forms a grid with x_range)
         h (float): water depth [metres]
+        rng (np.random.Generator, optional): random number generator for the amplitudes. Defaults to
+            np.random.RandomState(1452), which reproduces the previously hard coded seed.
 
     Returns:
-        eta (np.ndarray): random wave surface height [metres] (y_num, x_num)
+        eta (np.ndarray): random wave surface height [metres] (y_num, x_num), or (t_num, y_num, x_num) for vector t
     """
-    np.random.seed(1452)
+    frames = spatial_wave_frames(om_range, phi_range, Dr_spctrm, np.atleast_1d(t), x_range, y_range, h, rng)
+    eta = np.array(list(frames))
+
+    return eta if np.ndim(t) else eta[0]
+
+
+def spatial_wave_frames(om_range: np.ndarray, phi_range: np.ndarray, Dr_spctrm: np.ndarray, t_values: np.ndarray,
+                        x_range: np.ndarray, y_range: np.ndarray, h: float, rng: np.random.Generator = None,
+                        batch_size: int = 8) -> Iterator[np.ndarray]:
+    """yields successive random wave surface frames from a single directional realisation
+
+    amplitudes and wave numbers are drawn once, then frames are evaluated batch_size times at a time, so memory use
+    does not grow with the number of frames
+
+    Args:
+        om_range (np.ndarray): values of angular frequency to include
+        phi_range (np.ndarray): values of direction to include
+        Dr_spctrm (np.ndarray): frequency direction spectrum (phi_num, om_num)
+        t_values (np.ndarray): times of the frames, any iterable of times can be used
+        x_range (np.ndarray): range of x to evaluate over (forms a grid with y_range)
+        y_range (np.ndarray): range of y to evaluate over (forms a grid with x_range)
+        h (float): water depth [metres]
+        rng (np.random.Generator, optional): random number generator for the amplitudes. Defaults to
+            np.random.RandomState(1452).
+        batch_size (int, optional): number of frames evaluated together. Defaults to 8.
+
+    Yields:
+        np.ndarray: random wave surface height [metres] (y_num, x_num)
+    """
+    amp, k_x, k_y, om = _spatial_components(om_range, phi_range, Dr_spctrm, h, rng)
+
+    phase_x = np.exp(1j * np.outer(k_x, x_range))  # (n_comp, x_num)
+    phase_y = np.exp(1j * np.outer(y_range, k_y))  # (y_num, n_comp)
+
+    batch = []
+    for t in t_values:
+        batch.append(t)
+        if len(batch) == batch_size:
+            yield from _spatial_surface(amp, om, phase_x, phase_y, np.array(batch))
+            batch = []
+
+    if batch:
+        yield from _spatial_surface(amp, om, phase_x, phase_y, np.array(batch))
+
+
+def write_surface_animation(frames: Iterable[np.ndarray], x_range: np.ndarray, y_range: np.ndarray, filename: str,
+                            fps: int = 10, zlim: tuple[float, float] = None) -> None:
+    """writes surface frames, e.g. from spatial_wave_frames, straight to an animated gif without intermediate files
+
+    Args:
+        frames (Iterable[np.ndarray]): surface frames (y_num, x_num)
+        x_range (np.ndarray): x values of the frames
+        y_range (np.ndarray): y values of the frames
+        filename (str): output file
+        fps (int, optional): frames per second. Defaults to 10.
+        zlim (tuple[float, float], optional): vertical axis limits. Defaults to fitting the first frame.
+    """
+    x_grid, y_grid = np.meshgrid(x_range, y_range)
+
+    fig, ax = plt.subplots(subplot_kw={"projection": "3d"})
+    writer = PillowWriter(fps=fps)
+
+    with writer.saving(fig, filename, dpi=fig.dpi):
+        surf = None
+        for eta in frames:
+            if surf is not None:
+                surf.remove()
+            surf = ax.plot_surface(x_grid, y_grid, eta)
+            if zlim is None:
+                zlim = (np.min(eta), np.max(eta))
+            ax.set_zlim(*zlim)
+            writer.grab_frame()
+
+    plt.close(fig)
+
+
+def _spatial_components(om_range: np.ndarray, phi_range: np.ndarray, Dr_spctrm: np.ndarray, h: float,
+                        rng: np.random.Generator = None) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """draws a random realisation of the directional wave components
+
+    Args:
+        om_range (np.ndarray): values of angular frequency to include
+        phi_range (np.ndarray): values of direction to include
+        Dr_spctrm (np.ndarray): frequency direction spectrum (phi_num, om_num)
+        h (float): water depth [metres]
+        rng (np.random.Generator, optional): random number generator. Defaults to np.random.RandomState(1452).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: complex amplitudes A - iB, x and y wave numbers and
+            angular frequencies, one per (phi, om) component
+    """
+    if rng is None:
+        rng = np.random.RandomState(1452)
 
-    om_num = len(om_range)
     phi_num = len(phi_range)
-    x_num = len(x_range)
-    y_num = len(y_range)
+    om_num = len(om_range)
     d_om = om_range[1] - om_range[0]
     d_phi = phi_range[1] - phi_range[0]
 
-    A = np.random.normal(0, 1, size=(phi_num, om_num)) * np.sqrt(Dr_spctrm * d_om * d_phi)
-    B = np.random.normal(0, 1, size=(phi_num, om_num)) * np.sqrt(Dr_spctrm * d_om * d_phi)
+    A = rng.normal(0, 1, size=(phi_num, om_num)) * np.sqrt(Dr_spctrm * d_om * d_phi)
+    B = rng.normal(0, 1, size=(phi_num, om_num)) * np.sqrt(Dr_spctrm * d_om * d_phi)
+
+    k = cached_dispersion(om_range, h)
+
+    k_x = np.outer(np.cos(phi_range), k)
+    k_y = np.outer(np.sin(phi_range), k)
+    om = np.tile(om_range, (phi_num, 1))
 
-    k = np.empty(om_num)
-    for i_om, om in enumerate(om_range):
-        k[i_om] = solve_dispersion(om, h, upp=1)
+    return (A - B * 1j).ravel(), k_x.ravel(), k_y.ravel(), om.ravel()
+
+
+def _spatial_surface(amp: np.ndarray, om: np.ndarray, phase_x: np.ndarray, phase_y: np.ndarray,
+                     t: np.ndarray) -> np.ndarray:
+    """sums the wave components over a (y, x) grid at each time
+
+    uses A cos(theta) + B sin(theta) = Re((A - iB) exp(i theta)) with theta = k_x x + k_y y - om t, which separates into
+    a matrix product of the y and x phase factors
+
+    Args:
+        amp (np.ndarray): complex amplitudes A - iB (n_comp,)
+        om (np.ndarray): angular frequencies (n_comp,)
+        phase_x (np.ndarray): exp(i k_x x) (n_comp, x_num)
+        phase_y (np.ndarray): exp(i k_y y) (y_num, n_comp)
+        t (np.ndarray): times (t_num,)
+
+    Returns:
+        np.ndarray: surface elevation (t_num, y_num, x_num)
+    """
+    amp_t = amp[np.newaxis, :] * np.exp(-1j * np.outer(t, om))  # (t_num, n_comp)
+
+    return np.real((phase_y[np.newaxis, :, :] * amp_t[:, np.newaxis, :]) @ phase_x)
+
+
+def _directional_field(coef: np.ndarray, om: np.ndarray, phase: np.ndarray, t: np.ndarray,
+                       chunk_size: int) -> np.ndarray:
+    """sums directional wave components at a set of horizontal positions, chunked over time and position
+
+    evaluates Re(sum_c coef[r, c] exp(-i om_c t) phase[c, p]). The time and position factor
+    M[t, c, p] = exp(-i om_c t) phase[c, p] is built once per chunk and every row of coef, which may stack several
+    fields and depths, is contracted against it in a single matrix product. Chunks are sized so M holds no more than
+    about chunk_size complex values
+
+    Args:
+        coef (np.ndarray): complex coefficient of each component on each row (n_rows, n_comp)
+        om (np.ndarray): angular frequencies (n_comp,)
+        phase (np.ndarray): exp(i (k_x x + k_y y)) at each position (n_comp, n_pos)
+        t (np.ndarray): times (nt,)
+        chunk_size (int): approximate number of complex values held per chunk
+
+    Returns:
+        np.ndarray: field values (nt, n_rows, n_pos)
+    """
+    n_rows, n_comp = coef.shape
+    n_pos = phase.shape[1]
+    p_step = min(n_pos, max(1, chunk_size // n_comp))
+    t_step = max(1, chunk_size // (n_comp * p_step))
+
+    out = np.empty((len(t), n_rows, n_pos), dtype=coef.real.dtype)
+    for t_start in range(0, len(t), t_step):
+        time_factor = np.exp(-1j * np.outer(om, t[t_start:t_start + t_step])).astype(coef.dtype)  # (n_comp, nt_c)
+        nt_c = time_factor.shape[1]
+        for p_start in range(0, n_pos, p_step):
+            phase_c = phase[:, p_start:p_start + p_step]
+            # laid out (n_comp, nt_c * np_c) so the contraction is a single matrix product
+            M = (time_factor[:, :, np.newaxis] * phase_c[:, np.newaxis, :]).reshape(n_comp, -1)
+            values = np.real(coef @ M).reshape(n_rows, nt_c, phase_c.shape[1])
+            out[t_start:t_start + t_step, :, p_start:p_start + p_step] = values.transpose(1, 0, 2)
+
+    return out
+
+
+def depth_transfer_functions(k: np.ndarray, z_values: np.ndarray, d: float) -> tuple[np.ndarray, np.ndarray]:
+    """returns the linear depth transfer functions cosh(k(z+d))/sinh(kd) and sinh(k(z+d))/sinh(kd)
+
+    z values above -1 are evaluated at -1. Computed in exponential form so large kd cannot overflow, and cached
+    on (k, z_values, d) so repeated calls share the same read only arrays.
+
+    Args:
+        k (np.ndarray): wave numbers [m^-1]
+        z_values (np.ndarray): depth values [m]
+        d (float): water depth [m]
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: horizontal and vertical transfer functions (nz, nf)
+    """
+    k = np.asarray(k, dtype=float)
+    z_values = np.asarray(z_values, dtype=float)
+
+    def compute():
+        kz = k[np.newaxis, :] * np.minimum(z_values, -1)[:, np.newaxis]
+        kd = k[np.newaxis, :] * d
+        denom = -np.expm1(-2 * kd)
+        qf1 = (np.exp(kz) + np.exp(-kz - 2 * kd)) / denom
+        qf2 = (np.exp(kz) - np.exp(-kz - 2 * kd)) / denom
+        return qf1, qf2
+
+    return _TRANSFER_CACHE.get_or_compute(array_key(k, z_values, float(d)), compute)
+
+
+def _real_transform(coef: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """returns np.real(fftshift(fft(coef * scale, axis=0), axes=0)) using a half length real inverse transform
+
+    the real part of the transform of g is the transform of its Hermitian part (g_k + conj(g_-k)) / 2, which is
+    fully described by its first nf//2 + 1 terms, so only those are formed and passed to irfft
+
+    Args:
+        coef (np.ndarray): complex coefficients, frequency along axis 0
+        scale (np.ndarray): real factors broadcasting against coef, frequency along axis 0
+
+    Returns:
+        np.ndarray: real time series, time along axis 0
+    """
+    n = coef.shape[0]
+    half = np.arange(n // 2 + 1)
+    rev = -half % n
 
-    eta = np.empty([y_num, x_num])
+    # conjugate of the Hermitian part, so that the inverse transform gives the forward one
+    h_conj = (np.conj(coef[half]) * scale[half] + coef[rev] * scale[rev]) / 2
 
-    for i_x, x in enumerate(x_range):
-        for i_y, y in enumerate(y_range):
-            k_x = np.outer(np.cos(phi_range), k)
-            k_y = np.outer(np.sin(phi_range), k)
-            om_t = np.tile(om_range * t, (phi_num, 1))
-            eta[i_y, i_x] = np.sum(A * np.cos(k_x * x + k_y * y - om_t) + B * np.sin(k_x * x + k_y * y - om_t))
+    return fftshift(irfft(h_conj, n=n, axis=0, norm='forward'), axes=0)
 
-    return eta
+
+def stokes_coefficients(kd: np.ndarray) -> dict[str, np.ndarray]:
+    """returns the fifth order Stokes wave coefficients for given non-dimensional depths
+
+    Args:
+        kd (np.ndarray): wave number times water depth
+
+    Returns:
+        dict[str, np.ndarray]: coefficients A11 to A55, B22 to B55, C0 to C4, D2, D4, E2 and E4, each shaped as kd
+    """
+    kd = np.asarray(kd, dtype=float)
+    S = 1 / np.cosh(2 * kd)
+    sinh_kd = np.sinh(kd)
+    tanh_kd = np.tanh(kd)
+
+    co = {}
+    # Calculation of the A coefficients
+    co['A11'] = 1 / sinh_kd
+    co['A22'] = 3 * (S ** 2) / (2 * ((1. - S) ** 2))
+    co['A31'] = (-4 - 20 * S + 10 * (S ** 2) - 13 * (S ** 3)) / (8 * sinh_kd * ((1 - S) ** 3))
+    co['A33'] = (-2 * (S ** 2) + 11 * (S ** 3)) / (8 * sinh_kd * ((1.-S) ** 3))
+    co['A42'] = (12 * S - 14 * (S ** 2) - 264 * (S ** 3) - 45 * (S ** 4) - 13 * (S ** 5)) / (24*((1.-S)**5))
+    co['A44'] = (10 * (S ** 3) - 174 * (S ** 4) + 291 * (S ** 5) + 278 * (S ** 6)) / (48 * (3 + 2 * S) * ((1 - S) ** 5))
+    co['A51'] = (-1184 + 32 * S + 13232 * (S ** 2) + 21712 * (S ** 3) + 20940 * (S ** 4) + 12554 * (S ** 5)
+                 - 500 * (S ** 6) - 3341 * (S ** 7) - 670 * (S ** 8)) / (64 * sinh_kd * (3 + 2 * S) * (4 + S)
+                                                                         * ((1 - S) ** 6))
+    co['A53'] = (4 * S + 105 * (S ** 2) + 198 * (S ** 3) - 1376 * (S ** 4) - 1302 * (S ** 5) - 117
+                 * (S ** 6) + 58 * (S ** 7))/(32 * sinh_kd * (3 + 2 * S) * ((1 - S) ** 6))
+    co['A55'] = (-6 * (S ** 3) + 272 * (S ** 4) - 1552 * (S ** 5) + 852 * (S ** 6) + 2029 * (S ** 7) + 430
+                 * (S ** 8)) / (64 * sinh_kd * (3 + 2 * S) * (4 + S) * ((1 - S) ** 6))
+    # Calculation of the B coefficients
+    co['B22'] = (1 / tanh_kd) * (1 + 2 * S) / (2 * (1 - S))
+    co['B31'] = -3 * (1 + 3 * S + 3 * (S ** 2) + 2 * (S ** 3)) / (8 * ((1 - S) ** 3))
+    co['B42'] = (1 / tanh_kd) * (6 - 26 * S - 182 * (S ** 2) - 204 * (S ** 3) - 25 * (S ** 4) + 26
+                                 * (S ** 5)) / (6 * (3 + 2 * S) * ((1 - S) ** 4))
+    co['B44'] = (1./tanh_kd) * (24 + 92 * S + 122 * (S ** 2) + 66 * (S ** 3) + 67 * (S ** 4) + 34
+                                * (S ** 5)) / (24 * (3 + 2 * S) * ((1 - S) ** 4))
+    co['B53'] = 9 * (132 + 17 * S - 2216 * (S ** 2) - 5897 * (S ** 3) - 6292 * (S ** 4) - 2687 * (S ** 5)
+                     + 194 * (S ** 6) + 467 * (S ** 7) + 82 * (S ** 8)) / (128 * (3 + 2 * S) * (4 + S)
+                                                                           * ((1 - S) ** 6))
+    co['B55'] = 5 * (300 + 1579 * S + 3176 * (S ** 2) + 2949 * (S ** 3) + 1188 * (S ** 4) + 675 * (S ** 5)
+                     + 1326 * (S ** 6) + 827 * (S ** 7) + 130 * (S ** 8)) / (384 * (3 + 2 * S) * (4 + S)
+                                                                             * ((1 - S) ** 6))
+    # Calculation of the C coefficients
+    co['C0'] = np.sqrt(tanh_kd)
+    co['C2'] = (np.sqrt(tanh_kd) * (2 + 7 * S ** 2)) / (4 * (1-S) ** 2)
+    co['C4'] = (np.sqrt(tanh_kd) * (4 + 32 * S - 116 * S ** 2 - 400 * S ** 3 - 71 * S ** 4 + 146
+                                    * S ** 5)) / (32 * (1 - S) ** 5)
+    # Calculation of the D coefficients
+    co['D2'] = -0.5 * np.sqrt(1 / tanh_kd)
+    co['D4'] = (np.sqrt(1 / tanh_kd) * (2 + 4 * S + S ** 2 + 2 * S ** 3)) / (8 * (1 - S) ** 3)
+    # Calculation of the E coefficients
+    co['E2'] = (tanh_kd * (2 + 2 * S + 5 * S ** 2)) / (4 * (1 - S) ** 2)
+    co['E4'] = (tanh_kd * (8 + 12 * S - 152 * S ** 2 - 308 * S ** 3 - 42 * S ** 4 + 77 * S ** 5)) \
+        / (32 * (1 - S) ** 5)
+
+    return co
 
 
 @dataclass
@@ -67,12 +328,15 @@ class AbstractWaveKin(ABC):
     Args:
         t_values (np.ndarray): values in time at which to calculate kinematics [s]
         z_values (np.ndarray): depth values to calculate kimematics at [m]
+        dtype (type): floating point type of the computed kinematics and of their full size intermediates,
+            np.float32 halves memory use
     """
 
     sample_f: float
     period: float
     z_values: np.ndarray
     sea_state: SeaState
+    dtype: type = np.float64
 
     @property
     def depth(self) -> float:
@@ -133,12 +397,25 @@ class AbstractWaveKin(ABC):
     def compute_kinematics(self) -> AbstractWaveKin:
         """compute kinematics for given time and z_values
 
-        output stored in eta, u, w, du, dw
+        output stored in eta, u, w, du, dw. Subclasses take a fields argument selecting which kinematics to compute,
+        fields not requested are left as None and eta is always computed
 
         Returns:
             AbstractWaveKin: returns self
         """
 
+    @staticmethod
+    def _check_fields(fields: tuple, allowed: tuple = KINEMATIC_FIELDS) -> None:
+        """raises a ValueError if fields names any kinematic field not in allowed
+
+        Args:
+            fields (tuple): requested kinematic fields
+            allowed (tuple, optional): fields the class can compute. Defaults to KINEMATIC_FIELDS.
+        """
+        unknown = set(fields) - set(allowed)
+        if unknown:
+            raise ValueError(f"unknown kinematic fields {sorted(unknown)}, expected any of {allowed}")
+
     def retrieve_kinematics(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """ outputs the kinematics stored in self.kinematics
 
@@ -210,90 +487,91 @@ class LinearKin(AbstractWaveKin):
         return f_range
 
     def compute_spectrum(self) -> AbstractSpectrum:
-        """computes the spectral densities
+        """computes the (nss, nf) spectral densities of every sea state as one batch
 
         Returns:
             LinearKin: returns self
         """
-        self.spctr = []
-        for s in range(self.sea_state.num_SS):
-            spctr = self.sea_state.spctr_type(self.sea_state.hs[s], self.sea_state.tp[s], self.frequency)
-            spctr.compute_density()
-            spctr.compute_omega_density()
-            self.spctr.append(spctr)
+        self.spctr = SpectrumBatch.from_sea_state(self.sea_state, self.frequency).compute_density()
         return self
 
-    def compute_kinematics(self, cond: bool, a: np.ndarray = 0, NewWave: bool = False) -> LinearKin:
+    def compute_kinematics(self, cond: bool, a: np.ndarray = 0, NewWave: bool = False,
+                           fields: tuple = KINEMATIC_FIELDS) -> LinearKin:
         """computes linear wave kinematics
 
         Args:
             cond (bool): Set to True to generate a conditioned wave series
             a (np.ndarray, optional): Conditioned crest elevation at t=0. Defaults to 0.
             NewWave (bool, optional): Set to True to generate a NewWave. Defaults to False.
+            fields (tuple, optional): any of KINEMATIC_FIELDS. Defaults to all fields.
 
         Returns:
             LinearKin: returns self
         """
-
-        self.eta = np.empty((self.spctr[0].nf, self.sea_state.num_SS))
-        self.u = np.empty((self.spctr[0].nf, len(self.z_values), self.sea_state.num_SS))
-        self.du = np.empty((self.spctr[0].nf, len(self.z_values), self.sea_state.num_SS))
-        self.w = np.empty((self.spctr[0].nf, len(self.z_values), self.sea_state.num_SS))
-        self.dw = np.empty((self.spctr[0].nf, len(self.z_values), self.sea_state.num_SS))
-
-        for s in range(self.sea_state.num_SS):
-
-            if NewWave:
-                A = np.zeros(shape=(1, self.spctr[s].nf))
-                B = np.zeros(shape=(1, self.spctr[s].nf))
-
-            else:
-                A = np.random.normal(0, 1, size=(1, self.spctr[s].nf)) * np.sqrt(self.spctr[s].density*self.spctr[s].df)
-                B = np.random.normal(0, 1, size=(1, self.spctr[s].nf)) * np.sqrt(self.spctr[s].density*self.spctr[s].df)
-
-            if cond:
-                m = 0
-
-                c = self.spctr[s].df * self.spctr[s].density
-                d = self.spctr[s].df * self.spctr[s].density * self.spctr[s].omega
-
-                Q = (a[s] - np.sum(A))/np.sum(c)
-                R = (m - np.sum(self.spctr[s].omega * B))/np.sum(d*self.spctr[s].omega)
-
-                A = A + Q * c
-                B = B + R * d
-
-            i = complex(0, 1)
-            g1 = A + B * i
-
-            self.eta[:, s] = np.real(fftshift(fft(g1)))[0]
-
-            k = alt_solve_dispersion(self.spctr[s].omega, self.depth)
-
-            d = self.depth
-            for i_z, z in enumerate(self.z_values):
-
-                z_init = z
-                if z > -1:
-                    z = -1
-
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    qf1 = (np.cosh(k*(z+d))) / (np.sinh(k*d))
-                    qf2 = (np.sinh(k*(z+d))) / (np.sinh(k*d))
-
-                qf1[[i for i in range(len(qf1)) if math.isnan(qf1[i])]] = 1
-                qf2[[i for i in range(len(qf2)) if math.isnan(qf2[i])]] = 1
-
-                g2 = (A+B*i) * 2*np.pi*self.spctr[s].frequency * qf1
-                g3 = (B-A*i) * (2*np.pi*self.spctr[s].frequency)**2 * qf1
-                g4 = (B-A*i) * (2*np.pi*self.spctr[s].frequency) * qf2
-                g5 = (-A-B*i) * (2*np.pi*self.spctr[s].frequency)**2 * qf2
-
-                self.u[:, i_z, s] = np.real(fftshift(fft(g2))) * (z_init < self.eta[:, s]) + np.cos(self.sea_state.current_incidence) * self.sea_state.current
-                self.du[:, i_z, s] = np.real(fftshift(fft(g3))) * (z_init < self.eta[:, s])
-                self.w[:, i_z, s] = np.real(fftshift(fft(g4))) * (z_init < self.eta[:, s])
-                self.dw[:, i_z, s] = np.real(fftshift(fft(g5))) * (z_init < self.eta[:, s])
+        self._check_fields(fields)
+
+        nss = self.sea_state.num_SS
+        frequency = self.spctr.frequency.astype(self.dtype)
+        omega = self.spctr.omega.astype(self.dtype)
+        df = self.dtype(self.spctr.df)
+        # the shared unique rows are only expanded to one row per sea state here, where the amplitudes are drawn
+        density = self.spctr.unique_density.astype(self.dtype)[self.spctr.inverse]  # (nss, nf)
+
+        if NewWave:
+            A = np.zeros(shape=density.shape)
+            B = np.zeros(shape=density.shape)
+
+        else:
+            # drawn in the same order as a per sea state (A, B) loop so seeded runs are reproducible
+            AB = np.random.normal(0, 1, size=(nss, 2, len(frequency))).astype(self.dtype) \
+                * np.sqrt(density * df)[:, np.newaxis, :]
+            A = AB[:, 0, :]
+            B = AB[:, 1, :]
+
+        if cond:
+            m = 0
+
+            c = df * density
+            d = df * density * omega
+
+            Q = (np.asarray(a, dtype=self.dtype) - np.sum(A, axis=1))/np.sum(c, axis=1)
+            R = (m - np.sum(omega * B, axis=1))/np.sum(d*omega, axis=1)
+
+            A = A + Q[:, np.newaxis] * c
+            B = B + R[:, np.newaxis] * d
+
+        # coefficients are arranged (nf, nss) so that every transform runs along axis 0
+        A = A.T
+        B = B.T
+        i = complex(0, 1)
+
+        self.eta = _real_transform(A + B * i, np.ones((len(frequency), 1), dtype=self.dtype))
+
+        k = cached_dispersion(self.spctr.omega, self.depth)
+
+        qf1, qf2 = depth_transfer_functions(k, self.z_values, self.depth)
+        qf1 = qf1.astype(self.dtype)
+        qf2 = qf2.astype(self.dtype)
+
+        om = (2*np.pi*frequency)[:, np.newaxis, np.newaxis]
+        AB_plus = (A + B * i)[:, np.newaxis, :]
+        BA_minus = (B - A * i)[:, np.newaxis, :]
+        qf1 = qf1.T[:, :, np.newaxis]
+        qf2 = qf2.T[:, :, np.newaxis]
+
+        # (nt, nz, nss) mask of points below the free surface
+        wet = self.z_values[np.newaxis, :, np.newaxis] < self.eta[:, np.newaxis, :]
+
+        self.u = self.du = self.w = self.dw = None
+        if 'u' in fields:
+            self.u = _real_transform(AB_plus, om * qf1) * wet \
+                + self.dtype(np.cos(self.sea_state.current_incidence) * self.sea_state.current)
+        if 'du' in fields:
+            self.du = _real_transform(BA_minus, om**2 * qf1) * wet
+        if 'w' in fields:
+            self.w = _real_transform(BA_minus, om * qf2) * wet
+        if 'dw' in fields:
+            self.dw = _real_transform(-AB_plus, om**2 * qf2) * wet
 
         return self
 
@@ -315,47 +593,50 @@ class AiryKin(AbstractWaveKin):
         Returns:
             float: wave number
         """
-        return alt_solve_dispersion(self.sea_state.omega_det, self.depth)
+        return cached_dispersion(self.sea_state.omega_det, self.depth)
 
-    def compute_kinematics(self) -> AiryKin:
+    def compute_kinematics(self, fields: tuple = KINEMATIC_FIELDS) -> AiryKin:
         """computes airy wave kinematics and stores them in self
 
+        Args:
+            fields (tuple, optional): any of KINEMATIC_FIELDS. Defaults to all fields.
+
         Returns:
             AiryKin: returns self
         """
-        self.eta = np.empty((self.nt, self.sea_state.num_SS))
-        self.u = np.empty((self.nt, self.nz, self.sea_state.num_SS))
-        self.w = np.empty((self.nt, self.nz, self.sea_state.num_SS))
-        self.du = np.empty((self.nt, self.nz, self.sea_state.num_SS))
-        self.dw = np.empty((self.nt, self.nz, self.sea_state.num_SS))
-
-        for s in range(self.sea_state.num_SS):
-            for i_t, t in enumerate(self.t_values):
-                for i_z, z in enumerate(self.z_values):
-
-                    A = self.sea_state.H_det[s] / 2
-
-                    self.eta[i_t, s] = A * np.sin(self.sea_state.omega_det[s] * t - self.k[s] * self.x)
-
-                    if z > self.eta[i_t, s]:
-                        self.u[i_t, i_z, s] = self.w[i_t, i_z, s] = self.du[i_t, i_z, s] = self.dw[i_t, i_z, s] = 0
-
-                    else:
-                        self.u[i_t, i_z, s] = self.sea_state.omega_det[s] * A * ((np.cosh(self.k[s] * (self.depth + z)))
-                                                                                 / (np.sinh(self.k[s] * self.depth))) \
-                            * np.sin(self.sea_state.omega_det[s] * t - self.k[s] * self.x)
-
-                        self.w[i_t, i_z, s] = self.sea_state.omega_det[s] * A * ((np.sinh(self.k[s] * (self.depth + z)))
-                                                                                 / (np.sinh(self.k[s] * self.depth))) \
-                            * np.cos(self.sea_state.omega_det[s] * t - self.k[s] * self.x)
-
-                        self.du[i_t, i_z, s] = self.sea_state.omega_det[s] ** 2 * A * \
-                            ((np.cosh(self.k[s] * (self.depth + z))) / (np.sinh(self.k[s] * self.depth))) \
-                            * np.cos(self.sea_state.omega_det[s] * t - self.k[s] * self.x)
-
-                        self.dw[i_t, i_z, s] = -self.sea_state.omega_det[s] ** 2 * A * \
-                            ((np.sinh(self.k[s] * (self.depth + z))) / (np.sinh(self.k[s] * self.depth))) \
-                            * np.sin(self.sea_state.omega_det[s] * t - self.k[s] * self.x)
+        self._check_fields(fields)
+
+        # broadcast over (nt, nz, nss)
+        t = self.t_values[:, np.newaxis, np.newaxis]
+        z = self.z_values[np.newaxis, :, np.newaxis]
+        omega = self.sea_state.omega_det[np.newaxis, np.newaxis, :]
+        k = self.k[np.newaxis, np.newaxis, :]
+        A = self.sea_state.H_det[np.newaxis, np.newaxis, :] / 2
+
+        phase = omega * t - k * self.x
+
+        eta = A * np.sin(phase)
+        self.eta = eta[:, 0, :].astype(self.dtype)
+
+        wet = z <= eta
+        qf1 = np.cosh(k * (self.depth + z)) / np.sinh(k * self.depth)
+        qf2 = np.sinh(k * (self.depth + z)) / np.sinh(k * self.depth)
+
+        # the (nt, 1, nss) time and (1, nz, nss) depth factors are cast before they are multiplied out, so the only
+        # (nt, nz, nss) arrays formed are the outputs, in dtype, and the boolean wet mask
+        sin_phase = np.sin(phase).astype(self.dtype)
+        cos_phase = np.cos(phase).astype(self.dtype)
+        terms = {'u': (omega * A * qf1, sin_phase),
+                 'w': (omega * A * qf2, cos_phase),
+                 'du': (omega ** 2 * A * qf1, cos_phase),
+                 'dw': (-omega ** 2 * A * qf2, sin_phase)}
+
+        self.u = self.w = self.du = self.dw = None
+        for name in fields:
+            depth_term, time_term = terms[name]
+            field = depth_term.astype(self.dtype) * time_term
+            field *= wet
+            setattr(self, name, field)
 
         return self
 
@@ -377,177 +658,183 @@ class StokesKin(AbstractWaveKin):
         Returns:
             float: wave number
         """
-        # TODO: vectorise this
-        k = np.empty(self.sea_state.num_SS)
-        for s in range(self.sea_state.num_SS):
-            k[s] = fDispersionSTOKES5(self.depth, self.sea_state.H_det[s], self.sea_state.omega_det[s])
+        return self.stokes_table()[0]
+
+    def stokes_table(self) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """returns the wave numbers and fifth order coefficients for each sea state
+
+        cached on (depth, H, omega), which fix kd, so repeated kinematics calculations for the same design waves reuse
+        both the dispersion solutions and the coefficients
 
-        return k
+        Returns:
+            tuple[np.ndarray, dict[str, np.ndarray]]: wave numbers (nss,) and coefficients (nss,) keyed by name
+        """
+        H = np.asarray(self.sea_state.H_det, dtype=float)
+        omega = np.asarray(self.sea_state.omega_det, dtype=float)
 
-    def compute_kinematics(self) -> StokesKin:
+        def compute():
+            k = newton_dispersion_stokes5(self.depth, H, omega)
+            return k, stokes_coefficients(k * self.depth)
+
+        return _STOKES_CACHE.get_or_compute(array_key(float(self.depth), H, omega), compute)
+
+    def compute_kinematics(self, fields: tuple = KINEMATIC_FIELDS) -> StokesKin:
         """ computes Stokes wave kinematics and stores them in self
 
+        Args:
+            fields (tuple, optional): any of KINEMATIC_FIELDS. Defaults to all fields.
+
         Returns:
             StokesKin: returns self
         """
-        self.eta = np.empty((self.nt, self.sea_state.num_SS))
-        self.u = np.empty((self.nt, self.nz, self.sea_state.num_SS))
-        self.w = np.empty((self.nt, self.nz, self.sea_state.num_SS))
-        self.du = np.empty((self.nt, self.nz, self.sea_state.num_SS))
-        self.dw = np.empty((self.nt, self.nz, self.sea_state.num_SS))
-
-        for s in range(self.sea_state.num_SS):
-            for i_t, t in enumerate(self.t_values):
-                for i_z, z in enumerate(self.z_values):
-
-                    kd = self.k[s] * self.depth
-                    # !e Initialisation
-                    S = 1 / np.cosh(2 * kd)
-                    # Calculation of the A coefficients
-                    Aco = np.empty(9)
-                    Aco[0] = 1 / np.sinh(kd)
-                    Aco[1] = 3 * (S ** 2) / (2 * ((1. - S) ** 2))
-                    Aco[2] = (-4 - 20 * S + 10 * (S ** 2) - 13 * (S ** 3)) / (8 * np.sinh(kd) * ((1 - S) ** 3))
-                    Aco[3] = (-2 * (S ** 2) + 11 * (S ** 3)) / (8 * np.sinh(kd) * ((1.-S) ** 3))
-                    Aco[4] = (12 * S - 14 * (S ** 2) - 264 * (S ** 3) - 45 * (S ** 4) - 13
-                              * (S ** 5)) / (24*((1.-S)**5))
-                    Aco[5] = (10 * (S ** 3) - 174 * (S ** 4) + 291 * (S ** 5) + 278 * (S ** 6)) / (48 * (3 + 2 * S)
-                                                                                                   * ((1 - S) ** 5))
-                    Aco[6] = (-1184 + 32 * S + 13232 * (S ** 2) + 21712 * (S ** 3) + 20940 * (S ** 4) + 12554 * (S ** 5)
-                              - 500 * (S ** 6) - 3341 * (S ** 7) - 670 * (S ** 8)) / (64 * np.sinh(kd) * (3 + 2 * S)
-                                                                                      * (4 + S) * ((1 - S) ** 6))
-                    Aco[7] = (4 * S + 105 * (S ** 2) + 198 * (S ** 3) - 1376 * (S ** 4) - 1302 * (S ** 5) - 117
-                              * (S ** 6) + 58 * (S ** 7))/(32 * np.sinh(kd) * (3 + 2 * S) * ((1 - S) ** 6))
-                    Aco[8] = (-6 * (S ** 3) + 272 * (S ** 4) - 1552 * (S ** 5) + 852 * (S ** 6) + 2029 * (S ** 7) + 430
-                              * (S ** 8)) / (64 * np.sinh(kd) * (3 + 2 * S) * (4 + S) * ((1 - S) ** 6))
-                    # Calculation of the B coefficients
-                    Bco = np.empty(6)
-                    Bco[0] = (1 / np.tanh(kd)) * (1 + 2 * S) / (2 * (1 - S))
-                    Bco[1] = -3 * (1 + 3 * S + 3 * (S ** 2) + 2 * (S ** 3)) / (8 * ((1 - S) ** 3))
-                    Bco[2] = (1 / np.tanh(kd)) * (6 - 26 * S - 182 * (S ** 2) - 204 * (S ** 3) - 25 * (S ** 4) + 26
-                                                  * (S ** 5)) / (6 * (3 + 2 * S) * ((1 - S) ** 4))
-                    Bco[3] = (1./np.tanh(kd)) * (24 + 92 * S + 122 * (S ** 2) + 66 * (S ** 3) + 67 * (S ** 4) + 34
-                                                 * (S ** 5)) / (24 * (3 + 2 * S) * ((1 - S) ** 4))
-                    Bco[4] = 9 * (132 + 17 * S - 2216 * (S ** 2) - 5897 * (S ** 3) - 6292 * (S ** 4) - 2687 * (S ** 5)
-                                  + 194 * (S ** 6) + 467 * (S ** 7) + 82 * (S ** 8)) / (128 * (3 + 2 * S) * (4 + S)
-                                                                                        * ((1 - S) ** 6))
-                    Bco[5] = 5 * (300 + 1579 * S + 3176 * (S ** 2) + 2949 * (S ** 3) + 1188 * (S ** 4) + 675 * (S ** 5)
-                                  + 1326 * (S ** 6) + 827 * (S ** 7) + 130 * (S ** 8)) / (384 * (3 + 2 * S) * (4 + S)
-                                                                                          * ((1 - S) ** 6))
-                    # Calculation of the C coefficients
-                    Cco = np.empty(3)
-                    Cco[0] = np.sqrt(np.tanh(kd))
-                    Cco[1] = (np.sqrt(np.tanh(kd)) * (2 + 7 * S ** 2)) / (4 * (1-S) ** 2)
-                    Cco[2] = (np.sqrt(np.tanh(kd)) * (4 + 32 * S - 116 * S ** 2 - 400 * S ** 3 - 71 * S ** 4 + 146
-                                                      * S ** 5)) / (32 * (1 - S) ** 5)
-                    # Calculation of the D coefficients
-                    Dco = np.empty(2)
-                    Dco[0] = -0.5 * np.sqrt(1 / np.tanh(kd))
-                    Dco[1] = (np.sqrt(1 / np.tanh(kd)) * (2 + 4 * S + S ** 2 + 2 * S ** 3)) / (8 * (1 - S) ** 3)
-                    # Calculation of the E coefficients
-                    Eco = np.empty(2)
-                    Eco[0] = (np.tanh(kd) * (2 + 2 * S + 5 * S ** 2)) / (4 * (1 - S) ** 2)
-                    Eco[1] = (np.tanh(kd) * (8 + 12 * S - 152 * S ** 2 - 308 * S ** 3 - 42 * S ** 4 + 77 * S ** 5)) \
-                        / (32 * (1 - S) ** 5)
-
-                    # calculate properties
-                    # Initialising coefficients
-                    A11 = Aco[0]
-                    A22 = Aco[1]
-                    A31 = Aco[2]
-                    A33 = Aco[3]
-                    A42 = Aco[4]
-                    A44 = Aco[5]
-                    A51 = Aco[6]
-                    A53 = Aco[7]
-                    A55 = Aco[8]
-                    B22 = Bco[0]
-                    B31 = Bco[1]
-                    B42 = Bco[2]
-                    B44 = Bco[3]
-                    B53 = Bco[4]
-                    B55 = Bco[5]
-                    C0 = Cco[0]
-                    # Wave steepness
-                    epsilon = self.sea_state.H_det[s]/2 * self.k[s]
-                    #
-                    psi = self.k[s] * self.x - self.sea_state.omega_det[s] * t
-
-                    k_z_plus_h = self.k[s] * (z + self.depth)
-                    # z
-                    self.eta[i_t, s] = (1 / self.k[s]) * (epsilon * np.cos(psi) + B22 * (epsilon ** 2) * np.cos(2 * psi)
-                                                          + B31 * (epsilon ** 3) * (np.cos(psi) - np.cos(3 * psi))
-                                                          + (epsilon ** 4) * (B42 * np.cos(2 * psi) + B44
-                                                                              * np.cos(4 * psi))
-                                                          + (epsilon ** 5) * (-(B53 + B55) * np.cos(psi) + B53
-                                                                              * np.cos(3 * psi)
-                                                          + B55 * np.cos(5 * psi)))
-
-                    if z > self.eta[i_t, s]:
-                        self.u[i_t, i_z, s] = self.w[i_t, i_z, s] = self.du[i_t, i_z, s] = self.dw[i_t, i_z, s] = 0
-
-                    else:
-                        # u calculation
-                        self.u[i_t, i_z, s] = (C0 * np.sqrt(self.sea_state.g / self.k[s] ** 3)) \
-                            * (self.k[s] * np.cos(self.sea_state.theta)) \
-                            * (A11 * epsilon * np.cosh(k_z_plus_h) * np.cos(psi)
-                                + A22 * (epsilon ** 2) * np.cosh(2 * k_z_plus_h) * 2 * np.cos(2 * psi)
-                                + A31 * (epsilon ** 3) * np.cosh(k_z_plus_h) * np.cos(psi)
-                                + A33 * (epsilon ** 3) * np.cosh(3 * k_z_plus_h) * 3 * np.cos(3 * psi)
-                                + A42 * (epsilon ** 4) * np.cosh(2 * k_z_plus_h) * 2 * np.cos(2 * psi)
-                                + A44 * (epsilon ** 4) * np.cosh(4 * k_z_plus_h) * 4 * np.cos(4 * psi)
-                                + A51 * (epsilon ** 5) * np.cosh(k_z_plus_h) * np.cos(psi)
-                                + A53 * (epsilon ** 5) * np.cosh(3 * k_z_plus_h) * 3 * np.cos(3 * psi)
-                                + A55 * (epsilon ** 5) * np.cosh(5 * k_z_plus_h) * 5 * np.cos(5 * psi))
-                        # w calculation
-                        self.w[i_t, i_z, s] = (C0 * np.sqrt(self.sea_state.g / self.k[s] ** 3)) * self.k[s] \
-                            * (A11 * epsilon * np.sinh(k_z_plus_h)*np.sin(psi)
-                                + A22 * (epsilon ** 2) * np.sinh(2 * k_z_plus_h) * 2 * np.sin(2 * psi)
-                                + A31 * (epsilon ** 3) * np.sinh(k_z_plus_h) * np.sin(psi)
-                                + A33 * (epsilon ** 3) * np.sinh(3 * k_z_plus_h) * 3 * np.sin(3 * psi)
-                                + A42 * (epsilon ** 4) * np.sinh(2 * k_z_plus_h) * 2 * np.sin(2 * psi)
-                                + A44 * (epsilon ** 4) * np.sinh(4 * k_z_plus_h) * 4 * np.sin(4 * psi)
-                                + A51 * (epsilon ** 5) * np.sinh(k_z_plus_h) * np.sin(psi)
-                                + A53 * (epsilon ** 5) * np.sinh(3 * k_z_plus_h) * 3 * np.sin(3 * psi)
-                                + A55 * (epsilon ** 5) * np.sinh(5 * k_z_plus_h) * 5 * np.sin(5 * psi))
-                        #  dudt horizontal acceleration
-                        self.du[i_t, i_z, s] = (C0 * np.sqrt(self.sea_state.g / self.k[s] ** 3)) \
-                            * (self.k[s] * np.cos(self.sea_state.theta)) \
-                            * (A11 * (epsilon) * np.cosh(k_z_plus_h) * self.sea_state.omega_det[s] * np.sin(psi)
-                                + A22 * (epsilon ** 2) * np.cosh(2 * k_z_plus_h) * 2 * self.sea_state.omega_det[s]
-                                * np.sin(2 * psi)
-                                + A31 * (epsilon ** 3) * np.cosh(k_z_plus_h) * self.sea_state.omega_det[s] * np.sin(psi)
-                                + A33 * (epsilon ** 3) * np.cosh(3 * k_z_plus_h) * 3 * self.sea_state.omega_det[s]
-                                * np.sin(3 * psi)
-                                + A42 * (epsilon ** 4) * np.cosh(2 * k_z_plus_h) * 2 * self.sea_state.omega_det[s]
-                                * np.sin(2 * psi)
-                                + A44 * (epsilon ** 4) * np.cosh(4 * k_z_plus_h) * 4 * self.sea_state.omega_det[s]
-                                * np.sin(4 * psi)
-                                + A51 * (epsilon ** 5) * np.cosh(k_z_plus_h) * self.sea_state.omega_det[s] * np.sin(psi)
-                                + A53 * (epsilon ** 5) * np.cosh(3 * k_z_plus_h) * 3 * self.sea_state.omega_det[s]
-                                * np.sin(3 * psi)
-                                + A55 * (epsilon ** 5) * np.cosh(5 * k_z_plus_h) * 5 * self.sea_state.omega_det[s]
-                                * np.sin(5 * psi))
-                        # dwdt vertical acceleration
-                        self.dw[i_t, i_z, s] = (C0 * np.sqrt(self.sea_state.g / self.k[s] ** 3)) * self.k[s] \
-                            * (A11 * epsilon * np.sinh(k_z_plus_h)*self.sea_state.omega_det[s]*-np.cos(psi)
-                                + A22 * (epsilon ** 2) * np.sinh(2 * k_z_plus_h) * 2 * self.sea_state.omega_det[s]
-                                * -np.cos(2 * psi)
-                                + A31 * (epsilon ** 3) * np.sinh(k_z_plus_h) * self.sea_state.omega_det[s]
-                                * -np.cos(psi)
-                                + A33 * (epsilon ** 3) * np.sinh(3 * k_z_plus_h) * 3 * self.sea_state.omega_det[s]
-                                * -np.cos(3 * psi)
-                                + A42 * (epsilon ** 4) * np.sinh(2 * k_z_plus_h) * 2 * self.sea_state.omega_det[s]
-                                * -np.cos(2 * psi)
-                                + A44 * (epsilon ** 4) * np.sinh(4 * k_z_plus_h) * 4 * self.sea_state.omega_det[s]
-                                * -np.cos(4 * psi)
-                                + A51 * (epsilon ** 5) * np.sinh(k_z_plus_h) * self.sea_state.omega_det[s]
-                                * - np.cos(psi)
-                                + A53 * (epsilon ** 5) * np.sinh(3 * k_z_plus_h) * 3 * self.sea_state.omega_det[s]
-                                * -np.cos(3 * psi)
-                                + A55 * (epsilon ** 5) * np.sinh(5 * k_z_plus_h) * 5 * self.sea_state.omega_det[s]
-                                * -np.cos(5 * psi))
-
-                    if z > self.eta[i_t, s]:
-                        self.u[i_t, i_z, s] = self.w[i_t, i_z, s] = self.du[i_t, i_z, s] = self.dw[i_t, i_z, s] = 0
+        self._check_fields(fields)
+
+        k, co = self.stokes_table()
+
+        # Wave steepness
+        epsilon = self.sea_state.H_det/2 * k
+
+        # amplitude of each harmonic in the velocity potential, (5, nss)
+        harmonics = np.array([co['A11'] * epsilon + co['A31'] * epsilon ** 3 + co['A51'] * epsilon ** 5,
+                              2 * (co['A22'] * epsilon ** 2 + co['A42'] * epsilon ** 4),
+                              3 * (co['A33'] * epsilon ** 3 + co['A53'] * epsilon ** 5),
+                              4 * co['A44'] * epsilon ** 4,
+                              5 * co['A55'] * epsilon ** 5])
+
+        # broadcast over (nt, nz, nss)
+        omega = self.sea_state.omega_det[np.newaxis, np.newaxis, :]
+        psi = k * self.x - omega * self.t_values[:, np.newaxis, np.newaxis]
+        k_z_plus_h = k * (self.z_values[np.newaxis, :, np.newaxis] + self.depth)
+
+        B22, B31, B42, B44, B53, B55 = (co[name] for name in ('B22', 'B31', 'B42', 'B44', 'B53', 'B55'))
+        eta = (1 / k) * (epsilon * np.cos(psi) + B22 * (epsilon ** 2) * np.cos(2 * psi)
+                         + B31 * (epsilon ** 3) * (np.cos(psi) - np.cos(3 * psi))
+                         + (epsilon ** 4) * (B42 * np.cos(2 * psi) + B44 * np.cos(4 * psi))
+                         + (epsilon ** 5) * (-(B53 + B55) * np.cos(psi) + B53 * np.cos(3 * psi)
+                                             + B55 * np.cos(5 * psi)))
+        self.eta = eta[:, 0, :].astype(self.dtype)
+
+        wet = self.z_values[np.newaxis, :, np.newaxis] <= eta
+        vel = co['C0'] * np.sqrt(self.sea_state.g / k ** 3) * k
+
+        # each harmonic is a (1, nz, nss) depth factor times a (nt, 1, nss) time factor, both cast to dtype before
+        # they are multiplied out into a reused buffer, so no float64 array of the full kinematics size is formed
+        buffer = np.empty((self.nt, self.nz, self.sea_state.num_SS), dtype=self.dtype)
+
+        self.u = self.w = self.du = self.dw = None
+        for name in fields:
+            hyperbolic = np.cosh if name in ('u', 'du') else np.sinh
+            trig = np.cos if name in ('u', 'dw') else np.sin
+            scale = vel * {'u': 1, 'w': 1, 'du': omega, 'dw': -omega}[name]
+
+            field = np.zeros((self.nt, self.nz, self.sea_state.num_SS), dtype=self.dtype)
+            for n, a_n in enumerate(harmonics, start=1):
+                depth_term = (scale * a_n * hyperbolic(n * k_z_plus_h)).astype(self.dtype)
+                np.multiply(depth_term, trig(n * psi).astype(self.dtype), out=buffer)
+                field += buffer
+
+            field *= wet
+            if name in ('u', 'du'):
+                field *= self.dtype(np.cos(self.sea_state.theta))
+            setattr(self, name, field)
+
+        return self
+
+
+@dataclass
+class DirectionalLinearKin(AbstractWaveKin):
+    """ Directional Linear Random Wave Kinematics Class
+
+    one realisation of a short crested sea evaluated at several horizontal positions, so spatially separated members
+    see consistent kinematics. Outputs are arranged (nt, nz, n_pos) and (nt, n_pos) in place of the sea state axis.
+
+        Args:
+        spectrum (DirectionalSpectrum): frequency direction spectrum with computed density
+        x_values (np.ndarray): x coordinates of the positions to evaluate at [m]
+        y_values (np.ndarray): y coordinates of the positions to evaluate at [m]
+    """
+
+    spectrum: DirectionalSpectrum = None
+    x_values: np.ndarray = 0
+    y_values: np.ndarray = 0
+
+    @property
+    def n_pos(self) -> int:
+        """returns number of horizontal positions
+
+        Returns:
+            int: number of positions to evaluate at
+        """
+        return len(np.atleast_1d(self.x_values))
+
+    def compute_kinematics(self, rng: np.random.Generator = None, fields: tuple = DIRECTIONAL_FIELDS,
+                           chunk_size: int = 2**20) -> DirectionalLinearKin:
+        """computes directional linear wave kinematics at each position
+
+        Args:
+            rng (np.random.Generator, optional): random number generator used to draw the component amplitudes.
+                Defaults to np.random.
+            fields (tuple, optional): any of DIRECTIONAL_FIELDS. Defaults to all fields.
+            chunk_size (int, optional): approximate number of complex values held at once while summing components.
+                Defaults to 2**20.
+
+        Returns:
+            DirectionalLinearKin: returns self
+        """
+        self._check_fields(fields, DIRECTIONAL_FIELDS)
+
+        if rng is None:
+            rng = np.random
+
+        x = np.atleast_1d(np.asarray(self.x_values, dtype=float))
+        y = np.atleast_1d(np.asarray(self.y_values, dtype=float))
+        if x.shape != y.shape:
+            raise ValueError(f"x_values and y_values must have the same shape, got {x.shape} and {y.shape}")
+
+        spctr = self.spectrum
+        if spctr.density is None:
+            spctr.compute_density()
+
+        ctype = np.result_type(self.dtype, np.complex64)
+        amp, k_x, k_y, om = _spatial_components(spctr.omega, spctr.phi, spctr.density, self.depth, rng)
+        phase = np.exp(1j * (np.outer(k_x, x) + np.outer(k_y, y))).astype(ctype)  # (n_comp, n_pos)
+
+        # transfer functions depend only on frequency, so are tiled over direction to match the component order
+        k = cached_dispersion(spctr.omega, self.depth)
+        qf1, qf2 = depth_transfer_functions(k, self.z_values, self.depth)
+        n_phi = len(spctr.phi)
+        qf1 = np.tile(qf1, (1, n_phi))
+        qf2 = np.tile(qf2, (1, n_phi))
+        cos_phi = np.repeat(np.cos(spctr.phi), len(spctr.omega))
+        sin_phi = np.repeat(np.sin(spctr.phi), len(spctr.omega))
+
+        coefs = {'u': lambda: amp * om * cos_phi * qf1,
+                 'v': lambda: amp * om * sin_phi * qf1,
+                 'w': lambda: -1j * amp * om * qf2,
+                 'du': lambda: -1j * amp * om**2 * cos_phi * qf1,
+                 'dv': lambda: -1j * amp * om**2 * sin_phi * qf1,
+                 'dw': lambda: -amp * om**2 * qf2}
+        current = {'u': np.cos(self.sea_state.current_incidence) * self.sea_state.current,
+                   'v': np.sin(self.sea_state.current_incidence) * self.sea_state.current}
+
+        # eta and every requested field are stacked as rows so one pass over time and position computes them all
+        requested = [name for name in DIRECTIONAL_FIELDS if name in fields]
+        stacked = np.vstack([amp[np.newaxis, :]] + [coefs[name]() for name in requested]).astype(ctype)
+        values = _directional_field(stacked, om, phase, self.t_values, chunk_size)
+
+        # eta and the fields are views into values, masked in place
+        self.eta = values[:, 0, :]
+
+        # (nt, nz, n_pos) mask of points below the free surface
+        wet = self.z_values[np.newaxis, :, np.newaxis] < self.eta[:, np.newaxis, :]
+
+        for name in DIRECTIONAL_FIELDS:
+            setattr(self, name, None)
+        for i, name in enumerate(requested):
+            field = values[:, 1 + i * self.nz:1 + (i + 1) * self.nz, :]
+            field *= wet
+            if name in current:
+                field += self.dtype(current[name])
+            setattr(self, name, field)
+
         return self
@@ -8,12 +8,15 @@ from __future__ import annotations
 import numpy as np
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from wavesim.kinematics import AbstractWaveKin, LinearKin
+from typing import ClassVar
+from wavesim.kinematics import AbstractWaveKin, LinearKin, KINEMATIC_FIELDS
 import matplotlib.pyplot as plt
 from wavesim.spectrum import Jonswap
 from scipy.signal import argrelextrema
 import wavesim.crestdistributions as crestd
 
+LOAD_QUANTITIES = ('shear', 'moment', 'section')
+
 
 @dataclass
 class AbstractLoad(ABC):
@@ -21,9 +24,12 @@ class AbstractLoad(ABC):
 
     Args:
         kinematics (WaveKin): class of wave kinematics to use when computing load
+        required_fields (tuple): kinematic fields read by compute_load (class attribute)
     """
     kinematics: AbstractWaveKin
 
+    required_fields: ClassVar[tuple] = KINEMATIC_FIELDS
+
     @abstractmethod
     def compute_load(self) -> AbstractLoad:
         """compute load at individual z points in WaveKin
@@ -65,24 +71,164 @@ class MorisonLoad(AbstractLoad):
         rho (float): density of fluid
         c_m (np.ndarray): coefficient of mass
         c_d (np.ndarray): coefficient of drag
+        dtype (type): floating point type of the computed load
+        elevations (np.ndarray): elevations to compute the sectional shear at, the load summed over all z at or above
+            each elevation [m]
     """
 
     c_d: np.ndarray
     c_m: np.ndarray
     diameter: float = 1.0
     rho: float = 1024.0
+    dtype: type = np.float64
+    elevations: np.ndarray = None
+
+    required_fields: ClassVar[tuple] = ('u', 'du')
+
+    def compute_load(self, chunk_size: int = 2**20) -> MorisonLoad:
+        """compute base shear [MN], overturning moment about the mudline [MNm] and sectional shear [MN] time series
+        using morison load on a cylinder
 
-    def compute_load(self) -> MorisonLoad:
-        """compute base shear time series in MN using morison load on a cylinder
+        every quantity is a weighted sum of the force over z, so all are formed in one pass over the kinematics
+        without allocating an array the size of the kinematics. Stored in loads, with base shear also in load.
+
+        Args:
+            chunk_size (int, optional): approximate number of values in the drag buffer. Defaults to 2**20.
 
         Returns:
             MorisonLoad: returns self
         """
+        z_values = np.asarray(self.kinematics.z_values, dtype=float)
+        nz = self.kinematics.nz
+        scale = float(self.kinematics.dz) / 1e6  # 1e6 converts to MN from N
+
+        elevations = np.atleast_1d(np.asarray([] if self.elevations is None else self.elevations, dtype=float))
+        weights = np.vstack([np.ones(nz),
+                             z_values + self.kinematics.depth,  # lever arm about the mudline
+                             z_values[np.newaxis, :] >= elevations[:, np.newaxis]])  # (nq, nz)
 
-        F = self.rho * np.expand_dims(self.c_m, axis=(0, 2)) * (np.pi / 4) * (self.diameter ** 2) * self.kinematics.du\
-            + 0.5 * self.rho * np.expand_dims(self.c_d, axis=(0, 2)) * self.diameter * self.kinematics.u\
-            * np.abs(self.kinematics.u)
+        c_m = np.broadcast_to(np.asarray(self.c_m, dtype=self.dtype), (nz,))
+        c_d = np.broadcast_to(np.asarray(self.c_d, dtype=self.dtype), (nz,))
+        inertia = (self.rho * (np.pi / 4) * (self.diameter ** 2) * scale * c_m * weights).astype(self.dtype)
+        drag = (0.5 * self.rho * self.diameter * scale * c_d * weights).astype(self.dtype)
 
-        self.load = np.sum(F, axis=1) * self.kinematics.dz / 1e6  # 1e6 converts to MN from N
+        loads = _morison_reduce(self.kinematics.u, self.kinematics.du, inertia, drag, chunk_size, self.dtype)
+
+        self.loads = {'shear': loads[:, 0], 'moment': loads[:, 1], 'section': loads[:, 2:]}
+        self.load = self.loads['shear']
 
         return self
+
+    def retrieve_load(self, quantity: str = 'shear') -> np.ndarray:
+        """retrieve one of the load quantities stored in loads
+
+        Args:
+            quantity (str, optional): 'shear' (nt, nss), 'moment' (nt, nss) or 'section' (nt, n_elevations, nss).
+                Defaults to 'shear'.
+
+        Returns:
+            np.ndarray: induced load time series
+        """
+        if quantity not in LOAD_QUANTITIES:
+            raise ValueError(f"unknown load quantity {quantity}, expected any of {LOAD_QUANTITIES}")
+
+        return self.loads[quantity]
+
+    def compute_basis(self, groups: np.ndarray = None, quantity: str = 'shear',
+                      chunk_size: int = 2**20) -> MorisonLoad:
+        """compute the inertia and drag load bases, from which the load of any coefficient profile is a linear
+        combination
+
+        the load is linear in c_m * diameter^2 and in c_d * diameter separately on each level, so summing the unit
+        coefficient inertia and drag forces over each group of levels gives a basis (nt, 2 * n_groups, nss), stored in
+        basis, with the inertia terms first. Profiles constant on each group are then evaluated by profile_loads.
+
+        Args:
+            groups (np.ndarray, optional): integer group label 0, 1, ... of each z value. Defaults to a group per level.
+            quantity (str, optional): 'shear' or 'moment'. Defaults to 'shear'.
+            chunk_size (int, optional): approximate number of values in the drag buffer. Defaults to 2**20.
+
+        Returns:
+            MorisonLoad: returns self
+        """
+        if quantity not in ('shear', 'moment'):
+            raise ValueError(f"basis quantity must be 'shear' or 'moment', got {quantity}")
+
+        nz = self.kinematics.nz
+        labels = np.arange(nz) if groups is None else np.asarray(groups, dtype=int)
+        if labels.shape != (nz,):
+            raise ValueError(f"groups must label each of the {nz} z values, got shape {labels.shape}")
+
+        n_groups = labels.max() + 1
+        weights = (labels[np.newaxis, :] == np.arange(n_groups)[:, np.newaxis]) * float(self.kinematics.dz) / 1e6
+        if quantity == 'moment':
+            weights = weights * (np.asarray(self.kinematics.z_values, dtype=float) + self.kinematics.depth)
+
+        zeros = np.zeros((n_groups, nz))
+        inertia = np.vstack([self.rho * (np.pi / 4) * weights, zeros]).astype(self.dtype)
+        drag = np.vstack([zeros, 0.5 * self.rho * weights]).astype(self.dtype)
+
+        self.basis = _morison_reduce(self.kinematics.u, self.kinematics.du, inertia, drag, chunk_size, self.dtype)
+        self.n_groups = n_groups
+
+        return self
+
+    def profile_loads(self, c_d: np.ndarray, c_m: np.ndarray, diameter: np.ndarray = 1.0) -> np.ndarray:
+        """evaluate the load of many coefficient profiles from the basis in one matrix product
+
+        Args:
+            c_d (np.ndarray): drag coefficient of each group, (n_profiles, n_groups) or broadcastable to it
+            c_m (np.ndarray): inertia coefficient of each group, (n_profiles, n_groups) or broadcastable to it
+            diameter (np.ndarray, optional): diameter of each profile (n_profiles,). Defaults to 1.0.
+
+        Returns:
+            np.ndarray: load time series (nt, n_profiles, nss)
+        """
+        if not hasattr(self, 'basis'):
+            raise Exception("You must compute the basis first")
+
+        diameter = np.expand_dims(np.asarray(diameter, dtype=float), -1)
+        c_d, c_m, diameter = np.broadcast_arrays(np.atleast_2d(c_d), np.atleast_2d(c_m), diameter)
+        if c_d.shape[-1] != self.n_groups:
+            raise ValueError(f"profiles must give a coefficient for each of the {self.n_groups} groups")
+
+        coefficients = np.concatenate([c_m * diameter ** 2, c_d * diameter], axis=-1).astype(self.dtype)
+
+        return coefficients @ self.basis
+
+
+def _morison_reduce(u: np.ndarray, du: np.ndarray, inertia: np.ndarray, drag: np.ndarray, chunk_size: int,
+                    dtype: type) -> np.ndarray:
+    """returns sum_z inertia[z] du[t, z] + drag[z] u[t, z] |u[t, z]|
+
+    works through blocks of time, reusing one buffer for the drag term and the cast accelerations, so peak memory is
+    the output plus about chunk_size values whatever the size of the kinematics
+
+    Args:
+        u (np.ndarray): horizontal velocity (nt, nz, nss)
+        du (np.ndarray): horizontal acceleration (nt, nz, nss)
+        inertia (np.ndarray): inertia weights (..., nz)
+        drag (np.ndarray): drag weights (..., nz)
+        chunk_size (int): approximate number of values in the buffer
+        dtype (type): floating point type of the buffer and output
+
+    Returns:
+        np.ndarray: weighted sums (nt, ..., nss)
+    """
+    nt, nz, nss = u.shape
+    step = max(1, chunk_size // (nz * nss))
+    buffer = np.empty((min(step, nt), nz, nss), dtype=dtype)
+    out = np.empty((nt,) + inertia.shape[:-1] + (nss,), dtype=dtype)
+
+    for start in range(0, nt, step):
+        stop = min(start + step, nt)
+        buf = buffer[:stop - start]
+
+        np.abs(u[start:stop], out=buf)
+        buf *= u[start:stop]
+        out[start:stop] = drag @ buf
+
+        np.copyto(buf, du[start:stop], casting='same_kind')
+        out[start:stop] += inertia @ buf
+
+    return out
@@ -4,9 +4,14 @@ Code for generating Wave Spectra and associated functionality
 '''
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, replace
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy.signal import czt
+from wavesim.cache import LRUCache, array_key
+
+_SPECTRUM_CACHE = LRUCache(maxsize=256)
+_DIRECTIONAL_CACHE = LRUCache(maxsize=16)
 
 
 @dataclass
@@ -59,11 +64,29 @@ class SeaState():
 
         return 2*np.pi/self.T_det
 
+    def select(self, idx: np.ndarray) -> SeaState:
+        """get a subset of the sea states
+
+        Args:
+            idx (np.ndarray): indices (or boolean mask) of the sea states to keep
+
+        Returns:
+            SeaState: new sea state object holding only the selected sea states
+        """
+        selected = {}
+        for name in ('hs', 'tp', 'T_det', 'H_det'):
+            if getattr(self, name) is not None:
+                selected[name] = np.asarray(getattr(self, name))[idx]
+
+        return replace(self, **selected)
+
 
 @dataclass
 class AbstractSpectrum(ABC):
     """ Wave spectrum class
 
+    hs and tp may be scalars, giving density (nf,), or vectors of nss sea states, giving density (nss, nf)
+
     Args:
         frequency (np.ndarray): frequencies to evaluate spectral densities at [hertz]
         hs (np.ndarray): significant wave height of wave surface with this spectrum [m]
@@ -136,14 +159,25 @@ class AbstractSpectrum(ABC):
         self.omega_density = self.density / (2*np.pi)
         return self
 
+    def normalise(self) -> AbstractSpectrum:
+        """rescales density so the area under each spectrum is hs^2/16
+
+        Returns:
+            AbstractSpectrum: returns self
+        """
+        area = np.sum(self.density * self.df, axis=-1, keepdims=True)
+        self.density = self.density * np.expand_dims(np.asarray(self.hs, dtype=float), -1) ** 2 / (16 * area)
+
+        return self
+
     def plot_density(self, ang=False) -> None:
         """plot density stored in density
         """
         plt.figure()
         if ang:
-            plt.plot(self.omega, self.omega_density)
+            plt.plot(self.omega, self.omega_density.T)
         else:
-            plt.plot(self.frequency, self.density)
+            plt.plot(self.frequency, self.density.T)
         plt.show()
 
     def compute_kth_moment(self, k: int) -> float:
@@ -153,31 +187,31 @@ class AbstractSpectrum(ABC):
             k (int): moment
 
         Returns:
-            k_integral (float): integral equal to the kth moment
+            k_integral (float): integral equal to the kth moment, one per sea state for batched spectra
         """
 
-        k_integral = np.sum(self.density * (self.frequency ** k) * self.df)
+        k_integral = np.sum(self.density * (self.frequency ** k) * self.df, axis=-1)
 
         return k_integral
 
-    def compute_random_waves_acf(self, tau: np.ndarray) -> np.ndarray:
+    def compute_random_waves_acf(self, tau: np.ndarray, method: str = 'auto', chunk_size: int = 2**20) -> np.ndarray:
         """find acf function of the gaussian random wave surface with given spectrum
 
         Args:
             tau (np.ndarray): lags []
+            method (str, optional): 'direct' sums the cosine series in chunks of lags and accepts any lags, 'fft' uses
+                a chirp z transform and needs evenly spaced lags, 'auto' picks 'fft' when it applies.
+                Defaults to 'auto'.
+            chunk_size (int, optional): approximate number of values held at once by the direct method.
+                Defaults to 2**20.
 
         Returns:
-            acf (np.ndarray): auto correlation
+            acf (np.ndarray): auto correlation, (nss, tau_length) for batched spectra
         """
 
-        spctrl_area = self.compute_kth_moment(0)
-
-        outer_ft = np.outer(self.frequency, tau)  # (n_freq x tau_length)
+        spctrl_area = np.expand_dims(self.compute_kth_moment(0), -1)
 
-        acf_mat = np.cos(2 * np.pi * outer_ft) * self.density[:, np.newaxis] * self.df / spctrl_area
-        acf_vec = np.sum(acf_mat, axis=0)   # sum over columns to give (1 x tau_length)
-
-        return acf_vec
+        return _cosine_series(tau, self.frequency, self.density * self.df / spctrl_area, method, chunk_size)
 
 
 @dataclass
@@ -218,17 +252,19 @@ class Jonswap(AbstractSpectrum):
             Jonswap: spectral density
         """
 
-        sigma = (self.frequency < self.fp) * self.sigma_a + (self.frequency >= self.fp) * self.sigma_b
+        # sea states along the leading axis, frequencies along the last
+        tp = np.expand_dims(np.asarray(self.tp, dtype=float), -1)
+        fp = 1 / tp
 
-        gamma_coeff = self.gamma ** np.exp(-0.5 * (((self.frequency / self.fp - 1)/sigma) ** 2))
-        self.density = self.g ** 2 * (2 * np.pi) ** -4 * self.frequency ** -5 \
-            * np.exp(-1.25 * (self.tp*self.frequency) ** -4) * gamma_coeff
+        sigma = (self.frequency < fp) * self.sigma_a + (self.frequency >= fp) * self.sigma_b
 
-        area = sum(self.density*self.df)
+        gamma_coeff = self.gamma ** np.exp(-0.5 * (((self.frequency / fp - 1)/sigma) ** 2))
+        self.density = self.g ** 2 * (2 * np.pi) ** -4 * self.frequency ** -5 \
+            * np.exp(-1.25 * (tp*self.frequency) ** -4) * gamma_coeff
 
-        self.density *= self.hs ** 2 / (16 * area)
+        self.normalise()
 
-        self.density = self.density * (self.frequency < 5*self.fp)
+        self.density = self.density * (self.frequency < 5*fp)
 
         return self
 
@@ -262,6 +298,105 @@ class AltJonswap(Jonswap):
         return dens
 
 
+@dataclass
+class SpectrumBatch(AbstractSpectrum):
+    """ spectra of many sea states of one spectrum type held as a single (nss, nf) density
+
+    only the unique (hs, tp) rows are stored, in unique_density, with inverse mapping each sea state to its row.
+    Each row is cached on (spctr_type, hs, tp, frequency, g), so batches that partly overlap share the rows they
+    have in common and only the missing rows are evaluated, in one broadcast call. When every sea state is the same,
+    density is a read only broadcast view of the single cached row
+
+    Args:
+        spctr_type (type): AbstractSpectrum subclass to evaluate, must broadcast over vector hs and tp
+    """
+    spctr_type: type = Jonswap
+
+    @property
+    def nss(self) -> int:
+        """returns the number of sea states in the batch
+
+        Returns:
+            int: nss
+        """
+        return len(self.hs)
+
+    @classmethod
+    def from_sea_state(cls, sea_state: SeaState, frequency: np.ndarray) -> SpectrumBatch:
+        """builds the batch for every sea state in sea_state
+
+        Args:
+            sea_state (SeaState): sea states, spctr_type gives the spectrum evaluated
+            frequency (np.ndarray): frequencies to evaluate spectral densities at [hertz]
+
+        Returns:
+            SpectrumBatch: batch with density not yet computed
+        """
+        return cls(np.asarray(sea_state.hs, dtype=float), np.asarray(sea_state.tp, dtype=float), frequency,
+                   g=sea_state.g, spctr_type=sea_state.spctr_type)
+
+    def compute_density(self) -> SpectrumBatch:
+        """computes the unique spectral densities and the (nss, nf) density
+
+        Returns:
+            SpectrumBatch: returns self
+        """
+        frequency = np.asarray(self.frequency, dtype=float)
+        params = np.column_stack([np.asarray(self.hs, dtype=float), np.asarray(self.tp, dtype=float)])
+        unique, inverse = np.unique(params, axis=0, return_inverse=True)
+        self.inverse = inverse.ravel()
+
+        keys = [array_key(self.spctr_type, hs, tp, frequency, float(self.g)) for hs, tp in unique]
+        rows = [_SPECTRUM_CACHE.get(key) for key in keys]
+
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            spctr = self.spctr_type(unique[missing, 0], unique[missing, 1], frequency, g=self.g)
+            for i, row in zip(missing, spctr.compute_density().density):
+                rows[i] = _SPECTRUM_CACHE.get_or_compute(keys[i], row.copy)
+
+        if len(rows) == 1:
+            self.unique_density = rows[0][np.newaxis, :]
+            self.density = np.broadcast_to(rows[0], (self.nss, len(frequency)))
+        else:
+            self.unique_density = np.stack(rows)
+            self.unique_density.flags.writeable = False
+            self.density = self.unique_density[self.inverse]
+
+        return self
+
+    def compute_kth_moment(self, k: int) -> np.ndarray:
+        """function to return the kth moment of each spectrum in the batch, evaluated once per unique row
+
+        Args:
+            k (int): moment
+
+        Returns:
+            k_integral (np.ndarray): integral equal to the kth moment of each sea state (nss,)
+        """
+
+        return np.sum(self.unique_density * (self.frequency ** k) * self.df, axis=-1)[self.inverse]
+
+    def compute_random_waves_acf(self, tau: np.ndarray, method: str = 'auto', chunk_size: int = 2**20) -> np.ndarray:
+        """find acf function of the gaussian random wave surface of each sea state, evaluated once per unique row
+
+        Args:
+            tau (np.ndarray): lags []
+            method (str, optional): 'direct', 'fft' or 'auto', see AbstractSpectrum.compute_random_waves_acf.
+                Defaults to 'auto'.
+            chunk_size (int, optional): approximate number of values held at once by the direct method.
+                Defaults to 2**20.
+
+        Returns:
+            acf (np.ndarray): auto correlation (nss, tau_length)
+        """
+
+        spctrl_area = np.sum(self.unique_density * self.df, axis=-1, keepdims=True)
+        acf = _cosine_series(tau, self.frequency, self.unique_density * self.df / spctrl_area, method, chunk_size)
+
+        return acf[self.inverse]
+
+
 def djonswap(f: np.ndarray, hs: float, tp: float):
     """
     returns JONSWAP density for given frequency range
@@ -288,20 +423,24 @@ def djonswap(f: np.ndarray, hs: float, tp: float):
     gamma_coeff = gamma ** np.exp(-0.5 * (((f / fp - 1)/sigma) ** 2))
     dens = g ** 2 * (2 * np.pi) ** -4 * f ** -5 * np.exp(-1.25 * (tp*f) ** -4) * gamma_coeff
 
-    area = sum(dens*df)
+    area = np.sum(dens*df)
 
     dens *= hs ** 2 / (16 * area)
 
     return dens
 
 
-def random_waves_acf(tau: np.ndarray, f: np.ndarray, spctrl_dens: np.ndarray):
+def random_waves_acf(tau: np.ndarray, f: np.ndarray, spctrl_dens: np.ndarray, method: str = 'auto',
+                     chunk_size: int = 2**20):
     """find acf function of the gaussian random wave surface with given spectrum
 
     Args:
         tau (np.ndarray): lags []
         f (np.ndarray): contributing frequencies [hertz]
         spctrl_dens (np.ndarray): spectral densities for given frequencies []
+        method (str, optional): 'direct', 'fft' or 'auto', see AbstractSpectrum.compute_random_waves_acf.
+            Defaults to 'auto'.
+        chunk_size (int, optional): approximate number of values held at once by the direct method. Defaults to 2**20.
 
     Returns:
         acf (np.ndarray): auto correlation
@@ -310,12 +449,64 @@ def random_waves_acf(tau: np.ndarray, f: np.ndarray, spctrl_dens: np.ndarray):
     df = f[1] - f[0]
     spctrl_area = np.sum(spctrl_dens * df)
 
-    outer_ft = np.outer(f, tau)    # (n_freq x tau_length)
+    return _cosine_series(tau, f, spctrl_dens * df / spctrl_area, method, chunk_size)
+
+
+def _uniform_step(x: np.ndarray) -> float:
+    """returns the spacing of evenly spaced values, or None if they are not evenly spaced
 
-    acf_mat = np.cos(2 * np.pi * outer_ft) * spctrl_dens[:, np.newaxis] * df / spctrl_area    # (n_freq x tau_length)
-    acf_vec = np.sum(acf_mat, axis=0)   # sum over columns to give (1 x tau_length)
+    Args:
+        x (np.ndarray): values
+
+    Returns:
+        float: common step between consecutive values
+    """
+    if len(x) < 2:
+        return None
+    steps = np.diff(x)
+    if np.allclose(steps, steps[0], rtol=1e-9, atol=0):
+        return steps[0]
+    return None
 
-    return acf_vec
+
+def _cosine_series(tau: np.ndarray, f: np.ndarray, weights: np.ndarray, method: str, chunk_size: int) -> np.ndarray:
+    """evaluates sum_n weights[..., n] cos(2 pi f_n tau) at each lag
+
+    with evenly spaced f and tau the sum is exp(2 pi i f_0 tau_j) sum_n x_n W^(nj) with W = exp(2 pi i df dtau), a
+    chirp z transform taking O((nf + ntau) log(nf + ntau)) time. Otherwise the cosine matrix is built for a block of
+    lags at a time.
+
+    Args:
+        tau (np.ndarray): lags (ntau,)
+        f (np.ndarray): frequencies (nf,)
+        weights (np.ndarray): weight of each frequency (..., nf)
+        method (str): 'direct', 'fft' or 'auto'
+        chunk_size (int): approximate number of values held at once by the direct method
+
+    Returns:
+        np.ndarray: series values (..., ntau)
+    """
+    if method not in ('auto', 'direct', 'fft'):
+        raise ValueError(f"unknown acf method {method}, expected 'auto', 'direct' or 'fft'")
+
+    tau = np.atleast_1d(np.asarray(tau, dtype=float))
+    f = np.asarray(f, dtype=float)
+    d_tau = _uniform_step(tau)
+    df = _uniform_step(f)
+
+    if method == 'fft' and (d_tau is None or df is None):
+        raise ValueError("the fft acf method needs evenly spaced lags and frequencies")
+
+    if method != 'direct' and d_tau is not None and df is not None:
+        series = czt(weights, m=len(tau), w=np.exp(2j * np.pi * df * d_tau), a=np.exp(-2j * np.pi * df * tau[0]))
+        return np.real(series * np.exp(2j * np.pi * f[0] * tau))
+
+    step = max(1, chunk_size // len(f))
+    series = np.empty(weights.shape[:-1] + tau.shape)
+    for start in range(0, len(tau), step):
+        series[..., start:start + step] = weights @ np.cos(2 * np.pi * np.outer(f, tau[start:start + step]))
+
+    return series
 
 
 def kth_moment(k: int, f: np.ndarray, spctrl_dens: np.ndarray):
@@ -364,7 +555,7 @@ def frq_dr_spctrm(omega: np.ndarray, phi: np.ndarray, alpha: float, om_p: float,
 
 def sprd_fnc(omega: float, phi: float, om_p: float, phi_m: float, beta: float, nu: float,
              sig_l: float, sig_r: float):
-    """returns bimodal wrapped Gaussian spreading function D(omega, phi) at a single point
+    """returns bimodal wrapped Gaussian spreading function D(omega, phi), broadcasting over omega and phi
 
     Args:
         omega (float): angular frequency
@@ -379,23 +570,51 @@ def sprd_fnc(omega: float, phi: float, om_p: float, phi_m: float, beta: float, n
     Returns:
         dens (float): D(omega, phi) for given omega and phi
     """
-    k_num = 200
-    k_range = np.linspace(start=-k_num/2, stop=k_num/2, num=k_num + 1)
+    omega, phi = np.broadcast_arrays(np.asarray(omega, dtype=float), np.asarray(phi, dtype=float))
+
+    ratio = om_p / np.abs(omega)
+    separation = beta * np.exp(-nu * np.minimum(ratio, 1)) / 2
+    sigma = sig_l - sig_r / 3 * (4 * ratio ** 2 - ratio ** 8)
 
-    phi_m1 = phi_m + beta * np.exp(-nu * min(om_p / np.abs(omega), 1)) / 2
-    phi_m2 = phi_m - beta * np.exp(-nu * min(om_p / np.abs(omega), 1)) / 2
-    phi_arr = np.array([phi_m1, phi_m2])
+    dens = np.zeros(omega.shape)
+    for phi_mode in (phi_m + separation, phi_m - separation):
+        dens += _wrapped_normal(np.mod(phi - phi_mode + np.pi, 2 * np.pi) - np.pi, sigma)
 
-    sigma = sig_l - sig_r / 3 * (4 * (om_p / np.abs(omega)) ** 2 - (om_p / np.abs(omega)) ** 8)
+    return dens / 2
 
-    nrm_cnst = (2 * sigma * np.sqrt(2 * np.pi)) ** -1
-    dens_k = np.empty(k_num + 1)
 
-    for i_k, k in enumerate(k_range):
-        exp_term = np.exp(-0.5 * ((phi - phi_arr - 2 * np.pi * k) / sigma) ** 2)
-        dens_k[i_k] = np.sum(exp_term)
+def _wrapped_normal(delta: np.ndarray, sigma: np.ndarray) -> np.ndarray:
+    """returns the density of a zero mean normal wrapped onto the circle
 
-    dens = nrm_cnst * np.sum(dens_k)
+    narrow distributions sum just enough wrapped copies to cover 8.5 standard deviations, beyond which terms are below
+    double precision, and wide distributions use the Fourier series, which needs 3 terms once sigma > pi
+
+    Args:
+        delta (np.ndarray): angle from the mean, in [-pi, pi)
+        sigma (np.ndarray): standard deviation
+
+    Returns:
+        np.ndarray: density
+    """
+    delta, sigma = np.broadcast_arrays(delta, sigma)
+    dens = np.empty(delta.shape)
+
+    narrow = np.abs(sigma) <= np.pi
+    if np.any(narrow):
+        d = delta[narrow][:, np.newaxis]
+        sig = sigma[narrow][:, np.newaxis]
+        n_wrap = int(np.ceil(8.5 * np.max(np.abs(sig)) / (2 * np.pi))) + 1
+        k_range = np.arange(-n_wrap, n_wrap + 1)
+        dens[narrow] = np.sum(np.exp(-0.5 * ((d - 2 * np.pi * k_range) / sig) ** 2), axis=1) \
+            / (sig[:, 0] * np.sqrt(2 * np.pi))
+
+    wide = ~narrow
+    if np.any(wide):
+        d = delta[wide][:, np.newaxis]
+        sig = sigma[wide][:, np.newaxis]
+        p_range = np.arange(1, 4)
+        fourier = np.sum(np.exp(-0.5 * (p_range * sig) ** 2) * np.cos(p_range * d), axis=1)
+        dens[wide] = np.sign(sig[:, 0]) * (1 + 2 * fourier) / (2 * np.pi)
 
     return dens
 
@@ -419,3 +638,94 @@ def alt_djonswap(omega: float, alpha: float, om_p: float, gamma: float, r: float
     dens = alpha * omega ** -r * np.exp(-r / 4 * (np.abs(omega) / om_p) ** -4) * gamma ** delta
 
     return dens
+
+
+@dataclass
+class DirectionalSpectrum():
+    """ frequency direction spectrum D(omega, phi) S(omega) on a grid, using the bimodal wrapped Gaussian spreading in
+    sprd_fnc and the JONSWAP formulation in alt_djonswap
+
+    Args:
+        omega (np.ndarray): angular frequencies to evaluate at [s^-1]
+        phi (np.ndarray): directions (from) to evaluate at [radians]
+        alpha (float): scaling parameter
+        om_p (float): peak ang freq
+        gamma (float): peak enhancement factor
+        r (float): spectral tail decay index
+        phi_m (float): mean direction
+        beta (float): limiting peak separation
+        nu (float): peak separation shape
+        sig_l (float): limiting angular width
+        sig_r (float): angular width shape
+        hs (float): if given the density is rescaled to give this significant wave height [m]
+        density (np.ndarray): frequency direction spectral density (phi_num, om_num)
+    """
+    omega: np.ndarray
+    phi: np.ndarray
+    alpha: float = 0.7
+    om_p: float = 0.8
+    gamma: float = 3.3
+    r: float = 5.
+    phi_m: float = np.pi
+    beta: float = 4.
+    nu: float = 2.7
+    sig_l: float = 0.55
+    sig_r: float = 0.26
+    hs: float = None
+    density: np.ndarray = None
+
+    @property
+    def dom(self) -> float:
+        """returns the length of each angular frequency band (homogenous)
+
+        Returns:
+            float: dom
+        """
+        return self.omega[1] - self.omega[0]
+
+    @property
+    def dphi(self) -> float:
+        """returns the length of each direction band (homogenous)
+
+        Returns:
+            float: dphi
+        """
+        return self.phi[1] - self.phi[0]
+
+    @property
+    def grid(self) -> tuple[np.ndarray, np.ndarray]:
+        """returns omega and phi grids matching density
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: omega and phi meshgrids (phi_num, om_num)
+        """
+        return np.meshgrid(self.omega, self.phi)
+
+    def compute_spreading(self) -> np.ndarray:
+        """returns the spreading function on the grid
+
+        Returns:
+            np.ndarray: D(omega, phi) (phi_num, om_num)
+        """
+        omega_grid, phi_grid = self.grid
+        return sprd_fnc(omega_grid, phi_grid, self.om_p, self.phi_m, self.beta, self.nu, self.sig_l, self.sig_r)
+
+    def compute_density(self) -> DirectionalSpectrum:
+        """computes the frequency direction spectral density on the grid
+
+        output stored in density, cached on all parameters and grids so rebuilding the same spectrum is cheap
+
+        Returns:
+            DirectionalSpectrum: returns self
+        """
+        key = array_key(*(getattr(self, f.name) for f in fields(self) if f.name != 'density'))
+        self.density = _DIRECTIONAL_CACHE.get_or_compute(key, self._density)
+        return self
+
+    def _density(self) -> np.ndarray:
+        dens = self.compute_spreading() * alt_djonswap(self.omega, self.alpha, self.om_p, self.gamma, self.r)
+
+        if self.hs is not None:
+            dens *= self.hs ** 2 / (16 * np.sum(dens) * self.dom * self.dphi)
+
+        return dens
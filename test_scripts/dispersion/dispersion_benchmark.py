@@ -0,0 +1,47 @@
+from wavesim.dispersion import alt_solve_dispersion, solve_dispersion, fDispersionSTOKES5, newton_solve_dispersion, \
+    newton_dispersion_stokes5
+import numpy as np
+import time
+
+g = 9.81
+
+# linear dispersion -------------------------------------------------------------------------------------------------
+omega = np.linspace(1e-2, 3, 2000)
+
+for depth in [10., 100., 1000.]:
+
+    start = time.time()
+    k_bisect = np.array([solve_dispersion(om, depth, upp=1) for om in omega])
+    t_bisect = time.time() - start
+
+    start = time.time()
+    k_newton = newton_solve_dispersion(omega, depth)
+    t_newton = time.time() - start
+
+    start = time.time()
+    k_guo = alt_solve_dispersion(omega, depth)
+    t_guo = time.time() - start
+
+    def rel_residual(k):
+        return np.max(np.abs(omega ** 2 - g * k * np.tanh(k * depth)) / omega ** 2)
+
+    print(f"depth {depth}: bisection {t_bisect:.4f}s, newton {t_newton:.4f}s, guo {t_guo:.4f}s")
+    print(f"    max relative residual: bisection {rel_residual(k_bisect):.2e}, newton {rel_residual(k_newton):.2e}, "
+          f"guo {rel_residual(k_guo):.2e}")
+    print(f"    max relative error in k: bisection {np.max(np.abs(k_bisect - k_newton) / k_newton):.2e}, "
+          f"guo {np.max(np.abs(k_guo - k_newton) / k_newton):.2e}")
+
+# fifth order stokes dispersion -------------------------------------------------------------------------------------
+H = np.random.uniform(1, 30, 2000)
+omega = 2 * np.pi / np.random.uniform(8, 18, 2000)
+
+start = time.time()
+k_bisect = np.array([fDispersionSTOKES5(100., h, om) for h, om in zip(H, omega)])
+t_bisect = time.time() - start
+
+start = time.time()
+k_newton = newton_dispersion_stokes5(100., H, omega)
+t_newton = time.time() - start
+
+print(f"stokes: bisection {t_bisect:.4f}s, newton {t_newton:.4f}s, "
+      f"max relative difference {np.max(np.abs(k_bisect - k_newton) / k_newton):.2e}")
@@ -0,0 +1,87 @@
+from wavesim import spectrum as spctr
+from wavesim import kinematics as kin
+from wavesim.dispersion import cached_dispersion
+from scipy.fft import fft, fftshift
+import numpy as np
+
+
+def fft_reference(lin_wave: kin.LinearKin, cond: bool, a: np.ndarray, seed: int) -> tuple:
+    """recomputes LinearKin kinematics with the full complex transform np.real(fftshift(fft(...)))
+
+    Args:
+        lin_wave (kin.LinearKin): wave with spectrum computed
+        cond (bool): Set to True to generate a conditioned wave series
+        a (np.ndarray): Conditioned crest elevation at t=0
+        seed (int): seed used for the random amplitudes
+
+    Returns:
+        tuple: eta, u, w, du, dw
+    """
+    np.random.seed(seed)
+    nss = lin_wave.sea_state.num_SS
+    omega = lin_wave.spctr.omega
+    df = lin_wave.spctr.df
+    density = lin_wave.spctr.density
+
+    AB = np.random.normal(0, 1, size=(nss, 2, len(omega))) * np.sqrt(density * df)[:, np.newaxis, :]
+    A = AB[:, 0, :]
+    B = AB[:, 1, :]
+
+    if cond:
+        c = df * density
+        d = df * density * omega
+        A = A + ((a - np.sum(A, axis=1)) / np.sum(c, axis=1))[:, np.newaxis] * c
+        B = B + ((0 - np.sum(omega * B, axis=1)) / np.sum(d * omega, axis=1))[:, np.newaxis] * d
+
+    def real_fft(g):
+        return np.real(fftshift(fft(g, axis=-1), axes=-1))
+
+    eta = real_fft(A + B * 1j).T  # (nt, nss)
+
+    k = cached_dispersion(omega, lin_wave.depth)
+    qf1, qf2 = kin.depth_transfer_functions(k, lin_wave.z_values, lin_wave.depth)
+
+    AB_plus = (A + B * 1j)[:, np.newaxis, :]
+    BA_minus = (B - A * 1j)[:, np.newaxis, :]
+    wet = lin_wave.z_values[np.newaxis, :, np.newaxis] < eta[:, np.newaxis, :]
+
+    def field(g):
+        return real_fft(g).transpose(2, 1, 0) * wet  # (nss, nz, nt) to (nt, nz, nss)
+
+    u = field(AB_plus * omega * qf1) + np.cos(lin_wave.sea_state.current_incidence) * lin_wave.sea_state.current
+    w = field(BA_minus * omega * qf2)
+    du = field(BA_minus * omega ** 2 * qf1)
+    dw = field(-AB_plus * omega ** 2 * qf2)
+
+    return eta, u, w, du, dw
+
+
+# the packed half length transform against the full complex transform on random coefficients
+rng = np.random.default_rng(0)
+for nf in [400, 401]:
+    coef = rng.normal(size=(nf, 5)) + 1j * rng.normal(size=(nf, 5))
+    scale = rng.random(size=(nf, 1))
+    reference = np.real(fftshift(fft(coef * scale, axis=0), axes=0))
+    np.testing.assert_allclose(kin._real_transform(coef, scale), reference, rtol=0,
+                               atol=1e-12 * np.max(np.abs(reference)))
+    print(f"_real_transform matches the complex transform for nf={nf}")
+
+# LinearKin against the full complex transform, even and odd nt, with and without conditioning
+z_range = np.linspace(-100, 50, 40)
+ss = spctr.SeaState(hs=np.array([10., 15., 15.]), tp=np.array([10., 12., 12.]), current=1.0, current_incidence=0.2,
+                    spctr_type=spctr.Jonswap)
+a = np.array([8., 12., 20.])
+seed = 3
+
+for period in [100, 100.25]:
+    for cond in [False, True]:
+        lin_wave = kin.LinearKin(sample_f=4.00, period=period, z_values=z_range, sea_state=ss)
+        lin_wave.compute_spectrum()
+        np.random.seed(seed)
+        lin_wave.compute_kinematics(cond=cond, a=a)
+
+        reference = fft_reference(lin_wave, cond, a, seed)
+        for name, computed, expected in zip(['eta', 'u', 'w', 'du', 'dw'], lin_wave.retrieve_kinematics(), reference):
+            np.testing.assert_allclose(computed, expected, rtol=0, atol=1e-10 * np.max(np.abs(expected)),
+                                       err_msg=f"{name} differs for nt={lin_wave.nt}, cond={cond}")
+        print(f"LinearKin matches the complex transform for nt={lin_wave.nt}, cond={cond}")
@@ -0,0 +1,63 @@
+from wavesim.distest import AbstractDistEst, MorisonDistEst, CrestDistEst
+from scipy import optimize
+from wavesim.spectrum import SeaState, Jonswap
+import numpy as np
+import time
+
+
+def return_level(p: float, est: AbstractDistEst) -> float:
+    """gives the level at which the smoothed cdf reaches p, found by root finding rather than read off a grid so that
+    differences between precisions are not hidden by the grid step
+
+    Args:
+        p (float): non exceedance probability
+        est (AbstractDistEst): estimator with pdf and cdf computed
+
+    Returns:
+        float: level
+    """
+    upper = 2 * np.max(est.max_series)
+    return optimize.brentq(lambda x: est.eval_cdf(np.array([x]))[0] - p, 0, upper, xtol=1e-14, rtol=1e-14)
+
+
+num_sea_states = 2000
+z_num = 50
+z_values = np.linspace(-100, 50, z_num)
+
+# structure A profile from dist_write_parallel.py
+deck_ind = np.argmin(np.abs(z_values + 5.0))
+c_m = np.ones(z_num)
+c_d = np.ones(z_num)
+c_m[deck_ind:deck_ind+3] = 100.0
+c_d[deck_ind:deck_ind+3] = 100.0
+
+probs = [0.9, 0.99, 0.999]
+
+for hs, tp in [(10, 12), (15, 14), (25, 15)]:
+    ss = SeaState(hs=np.tile(hs, num_sea_states), tp=np.tile(tp, num_sea_states), spctr_type=Jonswap)
+
+    for est_type in [CrestDistEst, MorisonDistEst]:
+        levels = {}
+        max_series = {}
+        for dtype in [np.float64, np.float32]:
+            np.random.seed(1)
+            if est_type is MorisonDistEst:
+                est = est_type(sea_state=ss, z_values=z_values, c_d=c_d, c_m=c_m, dtype=dtype)
+            else:
+                est = est_type(sea_state=ss, z_values=z_values, dtype=dtype)
+
+            start = time.time()
+            est.compute_cond_crests()
+            est.compute_streamed_max(chunk_size=250)
+            end = time.time()
+
+            est.compute_pdf()
+            est.compute_cdf()
+            max_series[dtype] = est.max_series
+            levels[dtype] = np.array([return_level(p, est) for p in probs])
+            print(f"{est_type.__name__} hs={hs} tp={tp} {dtype.__name__}: max series in {end-start:.2f}s, "
+                  f"levels {levels[dtype]}")
+
+        rel_diff = np.abs(levels[np.float32] - levels[np.float64]) / levels[np.float64]
+        max_diff = np.max(np.abs(max_series[np.float32] - max_series[np.float64]) / np.abs(max_series[np.float64]))
+        print(f"relative return level difference {rel_diff}, largest relative max series difference {max_diff:.2e}")
@@ -0,0 +1,33 @@
+import numpy as np
+import time
+import wavesim.distest as dist
+import wavesim.spectrum as spctr
+
+num_sea_states = 500
+z_values = np.linspace(-100, 50, 150)
+
+# structure variants differ only in the height of the deck block, so group the levels into bands of 5m and give
+# every profile a coefficient per band
+groups = np.minimum(((z_values + 100) // 5).astype(int), 29)
+band_bottoms = np.arange(30) * 5.0 - 100
+deck_heights = np.arange(0.0, 30.0, 5.0)
+
+c_m = np.ones((len(deck_heights), 30))
+c_d = np.ones((len(deck_heights), 30))
+for p, deck_height in enumerate(deck_heights):
+    c_m[p, band_bottoms >= deck_height] = 100.0
+    c_d[p, band_bottoms >= deck_height] = 100.0
+
+np.random.seed(1)
+ss = spctr.SeaState(hs=np.tile(15.0, num_sea_states), tp=np.tile(12.0, num_sea_states), spctr_type=spctr.Jonswap)
+
+loadEst = dist.MorisonDistEst(sea_state=ss, z_values=z_values, c_d=c_d[0][groups], c_m=c_m[0][groups])
+loadEst.compute_cond_crests()
+loadEst.compute_kinematics()
+
+start = time.time()
+profile_max = loadEst.compute_profile_max(c_d, c_m, groups=groups)
+print(f"{len(deck_heights)} profiles from one basis in {time.time() - start:.2f}s")
+
+for deck_height, max_series in zip(deck_heights, profile_max):
+    print(f"deck at {deck_height}m: median sea-state max {np.median(max_series):.2f}MN")
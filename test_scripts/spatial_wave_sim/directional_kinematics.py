@@ -0,0 +1,35 @@
+from wavesim import spectrum as spctr
+from wavesim import kinematics as kin
+from wavesim import loading as load
+import numpy as np
+import matplotlib.pyplot as plt
+
+depth = 100
+z_range = np.linspace(-depth, 30, 100)
+ss = spctr.SeaState(hs=np.array([15]), tp=np.array([12]), spctr_type=spctr.Jonswap)
+
+omega = np.linspace(0.1, 3.0, 100)
+phi = np.linspace(0, 2 * np.pi, 36, endpoint=False)
+D_sprd = spctr.DirectionalSpectrum(omega, phi, hs=15).compute_density()
+
+# four legs of a jacket on a 40m square
+legs_x = np.array([-20, 20, 20, -20])
+legs_y = np.array([-20, -20, 20, 20])
+
+dir_wave = kin.DirectionalLinearKin(sample_f=4.00, period=200, z_values=z_range, sea_state=ss, spectrum=D_sprd,
+                                    x_values=legs_x, y_values=legs_y)
+dir_wave.compute_kinematics(rng=np.random.default_rng(1))
+
+leg_load = load.MorisonLoad(dir_wave, c_d=np.ones(len(z_range)), c_m=np.ones(len(z_range)))
+leg_load.compute_load()
+
+plt.figure()
+plt.subplot(2, 1, 1)
+plt.plot(dir_wave.t_values, dir_wave.eta)
+plt.ylabel('eta')
+plt.subplot(2, 1, 2)
+plt.plot(dir_wave.t_values, leg_load.load)
+plt.plot(dir_wave.t_values, np.sum(leg_load.load, axis=1), '-k')
+plt.xlabel('time')
+plt.ylabel('base shear (MN)')
+plt.show()